@@ -9,11 +9,19 @@ from openglider.utils.config import Config
 class GlobalConfig(Config):
     asinc_interpolation_points = 2000
     caching = True
+    # use mutation counters instead of hashing attributes to invalidate cached properties/functions,
+    # in-place changes (p.e. of lists or vectors) are only noticed when the owner is marked (utils.cache.bump_generation)
+    cache_generations = False
+    # approximate memory budget for all caches [bytes], the least recently used entries of the biggest caches are evicted
+    cache_max_bytes: int | None = None
     debug = False
     json_allowed_modules = [r"openglider\..*", r"euklid\..*", r"pyfoil\..*"]
     json_forbidden_modules = [r".*eval", r".*subprocess.*"]
     user = f"{platform.node()}/{getpass.getuser()}"
     home_directory = Path.home() / "openglider"
+    # store expensive results (p.e. flattened cells for patterns) in home_directory/cache (utils.disk_cache)
+    disk_cache = False
+    disk_cache_max_bytes = 2**30
 
 
 config = GlobalConfig()
@@ -19,6 +19,9 @@ class ArcSinc:
     def __call__(self, val: float) -> float:
         return self.arsinc.get_value(val)
 
+    def get_values(self, values: np.ndarray) -> np.ndarray:
+        return np.interp(values, self.arsinc_data[:, 0], self.arsinc_data[:, 1])
+
     def interpolate(self, numpoints: int) -> None:
         data = []
 
@@ -27,6 +30,7 @@ class ArcSinc:
             data.append([np.sinc(phi / np.pi), phi])
 
         self.arsinc = euklid.vector.Interpolation(data)
+        self.arsinc_data = np.array(data)
 
     @property
     def numpoints(self) -> int:
@@ -101,6 +105,20 @@ class BallooningBase(ABC):
         r_by_width = (1+ballooning_amount/2) / phi / 2
 
         return r_by_width * (math.sin(phi) / phi - math.cos(phi))
+
+    def get_mean_heights(self, x_values: list[float]) -> np.ndarray:
+        """
+        Vectorized get_mean_height for many x-values (multiply by cell width!)"""
+        ballooning_amounts = np.array([self[x] for x in x_values])
+        phi = np.where(ballooning_amounts < 0, 0., self.arcsinc.get_values(1/(ballooning_amounts+1)))
+
+        heights = np.zeros(len(phi))
+        valid = phi >= 1e-6
+        phi = phi[valid]
+        r_by_width = (1+ballooning_amounts[valid]/2) / phi / 2
+        heights[valid] = r_by_width * (np.sin(phi) / phi - np.cos(phi))
+
+        return heights
     
     def get_max_height(self, x: float) -> float:
         ballooning_amount = self[x]
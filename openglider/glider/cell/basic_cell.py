@@ -1,6 +1,9 @@
 from __future__ import annotations
 import math
+from collections.abc import Sequence
+
 import euklid
+import numpy as np
 
 from openglider.airfoil import Profile3D
 from openglider.utils.cache import cached_property
@@ -26,53 +29,62 @@ class BasicCell(BaseModel):
         elif y_value >= 1:            # right side
             return self.prof2
         else:                   # somewhere else
+            points, x_values = self.get_midrib_data([y_value], ballooning, arc_argument, close_trailing_edge)
 
-            # Ballooning is considered to be arcs, following 2 (two!) simple rules:
-            # 1: x1 = x*d
-            # 2: x2 = R*normvekt*(cos(phi2)-cos(phi)
-            # 3: norm(d)/r*(1-x) = 2*sin(phi(2))
+            return Profile3D(curve=euklid.vector.PolyLine3D(points[0].tolist()), x_values=x_values[0].tolist())
 
-            x_values: list[float] = []
-            distances = []
-            heights = []
-            node_len = len(self.prof1.curve)
+    def get_midrib_data(self, y_values: Sequence[float], ballooning: bool=True, arc_argument: bool=True, close_trailing_edge: bool=False) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Midrib points for many y-values at once
 
-            diff = self.prof2.curve.sub(self.prof1.curve)
+        :return: points (n_y, n_points, 3), x-values (n_y, n_points)
+        """
+        prof1, prof2, normvectors, x_values_1, x_values_2, ballooning_phi, ballooning_radius = self.midrib_arrays
 
-            if not ballooning:
-                midrib = self.prof1.curve.add(diff * y_value)
-            
+        y = np.clip(np.array(y_values, dtype=float), 0, 1)[:, np.newaxis]
+        x_values = x_values_1 + y * (x_values_2 - x_values_1)
+
+        # Ballooning is considered to be arcs, following 2 (two!) simple rules:
+        # 1: x1 = x*d
+        # 2: x2 = R*normvekt*(cos(phi2)-cos(phi)
+        # 3: norm(d)/r*(1-x) = 2*sin(phi(2))
+        distances = np.repeat(y, len(prof1), axis=1)
+        heights = np.zeros_like(distances)
+
+        if ballooning:
+            # Arc -> phi(bal) -> r
+            has_ballooning = ballooning_radius > 1e-10
+            if close_trailing_edge:
+                has_ballooning[[0, -1]] = False
+
+            phi = ballooning_phi[has_ballooning]    # phi is half only the half
+            radius = ballooning_radius[has_ballooning]
+
+            if arc_argument:
+                psi = phi * 2 * y                   # psi [-phi:phi]
+                distances[:, has_ballooning] = 0.5 - 0.5 * np.sin(phi - psi) / np.sin(phi)
+                heights[:, has_ballooning] = (np.cos(phi - psi) - np.cos(phi)) * radius
             else:
-                for i in range(len(self.prof1.curve.nodes)):  # Arc -> phi(bal) -> r  # oder so...
-                    x_left = self.prof1.x_values[i]
-                    x_right = self.prof2.x_values[i]
-                    x_values.append(x_left + y_value * (x_right - x_left))
-                    ballooning_radius = self.ballooning_radius[i]
-
-                    if close_trailing_edge and i in (0, node_len-1):
-                        d = y_value
-                        h = 0.
-
-                    elif ballooning_radius > 1e-10:
-                        phi = self.ballooning_phi[i]    # phi is half only the half
-                        
-                        if arc_argument:
-                            psi = phi * 2 * y_value         # psi [-phi:phi]
-                            d = 0.5 - 0.5 * math.sin(phi - psi) / math.sin(phi)
-                            h = (math.cos(phi - psi) - math.cos(phi)) * ballooning_radius
-                        else:
-                            d = y_value
-                            h = (math.cos(math.asin((2 * d - 1) * math.sin(phi))) -  math.cos(phi)) * ballooning_radius
-                    else:  # Without ballooning
-                        d = y_value
-                        h = 0.
-                    
-                    distances.append(d)
-                    heights.append(h)
-            
-                midrib = self.prof1.curve.add(diff.scale_nodes(distances)).add(self.normvectors.scale_nodes(heights))
+                heights[:, has_ballooning] = (np.cos(np.arcsin((2 * y - 1) * np.sin(phi))) - np.cos(phi)) * radius
+
+        points = prof1 + distances[:, :, np.newaxis] * (prof2 - prof1) + heights[:, :, np.newaxis] * normvectors
 
-            return Profile3D(curve=midrib, x_values=x_values)
+        return points, x_values
+
+    @cached_property('ballooning_phi', 'prof1', 'prof2')
+    def midrib_arrays(self) -> tuple[np.ndarray, ...]:
+        """
+        profile points, normvectors, x-values and ballooning (phi, radius) as arrays for get_midrib_data
+        """
+        return (
+            np.array(self.prof1.curve.tolist()),
+            np.array(self.prof2.curve.tolist()),
+            np.array(self.normvectors.tolist()),
+            np.array(self.prof1.x_values, dtype=float),
+            np.array(self.prof2.x_values, dtype=float),
+            np.array(self.ballooning_phi, dtype=float),
+            np.array(self.ballooning_radius, dtype=float),
+        )
 
     @cached_property('prof1', 'prof2')
     def normvectors(self) -> euklid.vector.PolyLine3D:
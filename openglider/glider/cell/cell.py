@@ -6,6 +6,7 @@ from collections.abc import Sequence
 from typing import ClassVar
 
 import euklid
+import numpy as np
 import openglider.utils
 import openglider.vector
 import pyfoil
@@ -265,7 +266,7 @@ class Cell(BaseModel):
     def point(self, y: float=0, i: int=0, k: float=0.) -> euklid.vector.Vector3D:
         return self.midrib(y).get(i+k)
 
-    @cached_function("self")
+    @cached_function("self", per_instance=True, max_size=256)
     def midrib(self, y: float, ballooning: bool=True, arc_argument: bool=True, close_trailing_edge: bool=False) -> Profile3D:
         kwargs = {
             "ballooning": ballooning,
@@ -284,9 +285,52 @@ class Cell(BaseModel):
         else:
             return self.basic_cell.midrib(y, ballooning=False)
 
-    def get_midribs(self, numribs: int) -> list[Profile3D]:
+    @cached_function("self", per_instance=True, max_size=16)
+    def get_midrib_grid(self, y_values: tuple[float, ...], ballooning: bool=True, arc_argument: bool=True, close_trailing_edge: bool=False) -> np.ndarray:
+        """
+        Midrib points for all y-values at once (see midrib)
+
+        :param y_values: y-distribution (tuple)
+        :return: read-only array (n_midribs, n_points, 3), the array is cached (copy it to modify)
+        """
+        if len(self._child_cells) == 1 or not ballooning:
+            if not ballooning:
+                arc_argument = close_trailing_edge = False
+            points, _ = self.basic_cell.get_midrib_data(y_values, ballooning, arc_argument, close_trailing_edge)
+            points.setflags(write=False)
+            return points
+
+        # group the y-values by the child cells (separated by miniribs)
+        grid = np.zeros((len(y_values), len(self.basic_cell.prof1.curve), 3))
+        child_y_values: list[list[tuple[int, float]]] = [[] for _ in self._child_cells]
+        yvalues = self._yvalues
+
+        for index, y in enumerate(y_values):
+            i = 0
+            while yvalues[i + 1] < y:
+                i += 1
+            child_y_values[i].append((index, (y - yvalues[i]) / (yvalues[i + 1] - yvalues[i])))
+
+        for cell, values in zip(self._child_cells, child_y_values):
+            if values:
+                indices, y_new = zip(*values)
+                points, _ = cell.get_midrib_data(y_new, ballooning, arc_argument, close_trailing_edge)
+                grid[list(indices)] = points
+
+        grid.setflags(write=False)
+        return grid
+
+    def get_midribs(self, numribs: int, ballooning: bool=True) -> list[Profile3D]:
         y_values = linspace(0, 1, numribs)
-        return [self.midrib(y) for y in y_values]
+        grid = self.get_midrib_grid(tuple(y_values), ballooning=ballooning)
+
+        x_values_1 = np.array(self.prof1.x_values)
+        x_values_2 = np.array(self.prof2.x_values)
+
+        return [
+            Profile3D(curve=euklid.vector.PolyLine3D(points.tolist()), x_values=(x_values_1 + y * (x_values_2 - x_values_1)).tolist())
+            for y, points in zip(y_values, grid)
+        ]
     
     @cached_property('ballooning', 'rib1.profile_2d.x_values', 'rib2.profile_2d.x_values', 'panels')
     def ballooning_modified(self) -> BallooningBase:
@@ -413,15 +457,13 @@ class Cell(BaseModel):
         """
         numribs += 1
 
-        grid: list[list[Vertex]] = []
         rib_indices = range(numribs + 1)
         if half_cell:
             rib_indices = rib_indices[(numribs) // 2:]
-        for rib_no in rib_indices:
-            y = rib_no / max(numribs, 1)
-            rib = self.midrib(y).curve.nodes
-            grid.append(Vertex.from_vertices_list(rib[:-1]))
-        return grid
+
+        y_values = tuple(rib_no / max(numribs, 1) for rib_no in rib_indices)
+
+        return [Vertex.from_vertices_list(rib[:-1].tolist()) for rib in self.get_midrib_grid(y_values)]
 
     def get_mesh(self, numribs: int=0, half_cell: bool=False) -> Mesh:
         """
@@ -452,74 +494,52 @@ class Cell(BaseModel):
                     {self.rib1.name: grid[0], self.rib2.name: grid[-1], "trailing_edge": trailing_edge})
         return mesh
 
-    @cached_function("self")
+    @cached_function("self", persistent=True)
     def get_flattened_cell(self, numribs: int=50, num_inner: int | None=None) -> FlattenedCell:
-        midribs = self.get_midribs(numribs)
-        numpoints = len(midribs[0].curve.nodes)
-
-        len_dct = {}
-        def get_length(ik1: float, ik2: float) -> float:
-            index_str = f"{ik1}:{ik2}"
-            if index_str not in len_dct:
-                points = []
-                for i, rib in enumerate(midribs):
-                    x = ik1 + i/(numribs-1) * (ik2-ik1)
-                    points.append(rib[x])
-                
-                line = euklid.vector.PolyLine3D(points)
-
-                len_dct[index_str] = line.get_length()
-
-            return len_dct[index_str]
+        y_values = openglider.utils.linspace(0, 1, numribs)
+        grid = self.get_midrib_grid(tuple(y_values))
 
-        l_0 = get_length(0, 0)
+        # 3d lengths along the midribs: straight (i -> i) and diagonal (i -> i+1)
+        t = np.array(y_values)[:, np.newaxis, np.newaxis]
+        diagonals = grid[:, :-1] + t * (grid[:, 1:] - grid[:, :-1])
+        lengths_straight = np.linalg.norm(np.diff(grid, axis=0), axis=2).sum(axis=0)
+        lengths_diagonal = np.linalg.norm(np.diff(diagonals, axis=0), axis=2).sum(axis=0)
 
-        left_bal = [euklid.vector.Vector2D([0, 0])]
-        right_bal = [euklid.vector.Vector2D([l_0, 0])]
+        # side lengths (left and right rib)
+        d_l = np.linalg.norm(np.diff(grid[0], axis=0), axis=1)
+        d_r = np.linalg.norm(np.diff(grid[-1], axis=0), axis=1)
 
-        rotate_left = euklid.vector.Rotation2D(-math.pi/2)
-        rotate_right = euklid.vector.Rotation2D(math.pi/2)
-
-        def get_point(p1: euklid.vector.Vector2D, p2: euklid.vector.Vector2D, l_0: float, l_l: float, l_r: float, left: bool=True) -> euklid.vector.Vector2D:
+        def get_triangles(l_0: np.ndarray, l_l: np.ndarray, l_r: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+            # position of the third point relative to the base (length l_0) of a triangle
             lx = (l_0**2 + l_l**2 - l_r**2) / (2*l_0)
-            ly_sq = l_l**2 - lx**2
-            if ly_sq > 0:
-                ly = math.sqrt(ly_sq)
-            else:
-                ly = 0
-            diff = (p2 - p1).normalized()
-            if left:
-                diff_y = rotate_right.apply(diff)
-            else:
-                diff_y = rotate_left.apply(diff)
+            ly = np.sqrt(np.maximum(l_l**2 - lx**2, 0))
+            return lx, ly
 
-            return p1 + diff*lx + diff_y*ly
+        # triangle strip: (p_left_i, p_right_i, p_right_i+1), (p_left_i, p_right_i+1, p_left_i+1)
+        lx_r, ly_r = get_triangles(lengths_straight[:-1], d_r, lengths_diagonal)
+        lx_l, ly_l = get_triangles(lengths_diagonal, d_l, lengths_straight[1:])
 
+        numpoints = grid.shape[1]
+        left_bal = np.zeros((numpoints, 2))
+        right_bal = np.zeros((numpoints, 2))
+        right_bal[0, 0] = lengths_straight[0]
 
         for i in range(numpoints-1):
-            p1 = left_bal[-1]
-            p2 = right_bal[-1]
+            p1 = left_bal[i]
+            p2 = right_bal[i]
 
+            diff = (p1 - p2) / np.linalg.norm(p1 - p2)
+            pr_2 = p2 + diff * lx_r[i] + np.array([diff[1], -diff[0]]) * ly_r[i]
 
-            d_l = (midribs[0][i] - midribs[0][i+1]).length()
-            d_r = (midribs[-1][i] - midribs[-1][i+1]).length()
-            l_0 = get_length(i, i)
-
-            #if False:
-            #    pr_2 = get_point(p2, pl_2, get_length(i+1, i), d_r, get_length(i+1, i+1), left=False)
-            #    pl_2 = get_point(p1, p2, l_0, d_l, get_length(i+1, i))
-            #else:
-            
-            pr_2 = get_point(p2, p1, l_0, d_r, get_length(i, i+1), left=False)
-            pl_2 = get_point(p1, pr_2, get_length(i, i+1), d_l, get_length(i+1, i+1))
+            diff = (pr_2 - p1) / np.linalg.norm(pr_2 - p1)
+            pl_2 = p1 + diff * lx_l[i] + np.array([-diff[1], diff[0]]) * ly_l[i]
 
-            left_bal.append(pl_2)
-            right_bal.append(pr_2)
-            #right_bal.append(get_point(p2, p1, l_0, d_r, get_length(i, i+1), left=False))
+            left_bal[i+1] = pl_2
+            right_bal[i+1] = pr_2
 
         ballooned = (
-            euklid.vector.PolyLine2D(left_bal),
-            euklid.vector.PolyLine2D(right_bal)
+            euklid.vector.PolyLine2D(left_bal.tolist()),
+            euklid.vector.PolyLine2D(right_bal.tolist())
         )
 
         inner = []
@@ -378,10 +378,19 @@ class TensionStrap(DiagonalRib):
     
     def __json__(self) -> dict[str, Any]:
         return {
-            "left": self.side1.center,
-            "right": self.side2.center,
-            "width": (self.side1.width + self.side2.width)/2,
-            "height": self.side1.height
+            "side1": self.side1.center,
+            "side2": self.side2.center,
+            "width": self.side1.width,
+            "height": self.side1.height,
+            "material_code": self.material_code,
+            "name": self.name,
+            "num_folds": self.num_folds,
+            "fold_allowance": self.fold_allowance,
+            "hole_num": self.hole_num,
+            "hole_border_side": self.hole_border_side,
+            "hole_border_front_back": self.hole_border_front_back,
+            "curve_factor": self.curve_factor,
+            "curve_factor_2": self.curve_factor_2
         }
 
 class TensionLine(TensionStrap):
@@ -396,8 +405,8 @@ class TensionLine(TensionStrap):
         super().__init__(side1, side2, Length(0.01), material_code=material_code, name=name)
 
     def __json__(self) -> dict[str, Any]:
-        return {"left": self.side1,
-                "right": self.side2,
+        return {"side1": self.side1.center,
+                "side2": self.side2.center,
                 "material_code": self.material_code,
                 "name": self.name
             }
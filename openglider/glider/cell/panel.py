@@ -294,13 +294,13 @@ class Panel(BaseModel):
         """
         xvalues = cell.rib1.profile_2d.x_values
         ribs = []
+
+        if midribs is None:
+            midribs = cell.get_midribs(numribs + 1)
+
         for i in range(numribs + 1):
             y = i / numribs
-
-            if midribs is None:
-                midrib = cell.midrib(y)
-            else:
-                midrib = midribs[i]
+            midrib = midribs[i]
 
             x1 = self.cut_front.x_left + y * (self.cut_front.x_right -
                                                self.cut_front.x_left)
@@ -330,13 +330,12 @@ class Panel(BaseModel):
         rib_node_indices: list[list[int]] = []
 
         ik_values = self._get_ik_values(cell, numribs, exact=exact)
+        midribs = cell.get_midribs(numribs + 2)
 
         for rib_no in range(numribs + 2):
-            y = rib_no / max(numribs+1, 1)
-
             front, back = ik_values[rib_no]
 
-            midrib = cell.midrib(y)
+            midrib = midribs[rib_no]
 
             rib_iks.append(midrib.get_positions(front, back))
 
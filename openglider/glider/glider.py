@@ -73,6 +73,7 @@ class Glider:
             if line.upper_node.name in attachment_points:
                 line.upper_node = attachment_points[line.upper_node.name]
         
+        glider.lineset.invalidate_index()
         glider.lineset.recalc(glider=glider)
 
         return glider
@@ -178,9 +179,10 @@ class Glider:
             return []
         #will hold all the points
         ribs = []
+        y_values = tuple(y * 1. / num_midribs for y in range(num_midribs))
         for cell in self.cells:
-            for y in range(num_midribs):
-                ribs.append(cell.midrib(y * 1. / num_midribs, ballooning=ballooning).curve.nodes)
+            for rib in cell.get_midrib_grid(y_values, ballooning=ballooning):
+                ribs.append(euklid.vector.PolyLine3D(rib.tolist()).nodes)
         ribs.append(self.cells[-1].midrib(1.).curve.nodes)
         return ribs
 
@@ -257,14 +259,14 @@ class Glider:
             for p_cell in cell.attachment_points:
                 p_cell.get_position(cell)
         
+        mirror = euklid.vector.Vector3D([1,-1,1])
         for node in [node for node in other2.lineset.nodes]:
             if node.node_type != node.NODE_TYPE.UPPER:
-                mirror = euklid.vector.Vector3D([1,-1,1])
                 node.position *= mirror
             if all(node.force):
                 node.force *= mirror
 
-        other2.lineset.lines += other.lineset.lines
+        other2.lineset.lines = other2.lineset.lines + other.lineset.lines
         other2.lineset.recalc()
 
         # rename
@@ -1,14 +1,18 @@
 from __future__ import annotations
 
 import copy
+import dataclasses
 import logging
 import math
-from typing import TYPE_CHECKING
+import weakref
+from typing import TYPE_CHECKING, Any
 from collections.abc import Callable
 
 import euklid
+import numpy as np
 from openglider.glider.parametric.config import ParametricGliderConfig, SewingAllowanceConfig
 from openglider.glider.parametric.table.base.parser import Parser
+import openglider.jsonify
 import openglider.materials
 import pyfoil
 from openglider.glider.ballooning.base import BallooningBase
@@ -24,7 +28,7 @@ from openglider.glider.parametric.shape import ParametricShape
 from openglider.glider.parametric.table import GliderTables
 from openglider.glider.rib import Rib, SingleSkinRib
 from openglider.utils import ZipCmp
-from openglider.utils.cache import cached_property
+from openglider.utils.cache import cached_property, get_generation, recursive_getattr
 from openglider.utils.dataclass import dataclass, Field
 from openglider.utils.distribution import Distribution
 from openglider.utils.table import Table
@@ -36,6 +40,45 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+# parametric inputs of the stages of get_glider_3d
+glider_3d_inputs: dict[str, list[str]] = {
+    "profiles": ["profiles", "profile_merge_curve", "shape", "config", "tables.profile_modifiers"],
+    "rib_elements": ["shape", "allowances", "tables.curves", "tables.material_ribs", "tables.profile_modifiers", "tables.holes", "tables.rigidfoils_rib", "tables.rib_modifiers"],
+    "ribs": ["shape", "glide", "allowances", "tables.curves", "tables.attachment_points_rib"],
+    "cells": ["shape", "balloonings", "ballooning_merge_curve", "config", "tables.curves", "tables.ballooning_modifiers", "tables.attachment_points_cell", "tables.rigidfoils_cell"],
+    "cell_elements": ["shape", "allowances", "tables.curves", "tables.cuts", "tables.material_cells", "tables.diagonals", "tables.straps", "tables.miniribs"],
+    "lineset": ["config", "speed", "glide", "tables.lines"],
+}
+
+
+@dataclasses.dataclass
+class Glider3DState:
+    """
+    Input digests and intermediate results of the last get_glider_3d call for a 3d glider
+    """
+    inputs: dict[str, str]
+    profiles: list[pyfoil.Airfoil]
+    rib_elements: list[dict[str, Any]]
+    rib_keys: list[tuple[Any, ...]]
+    cell_keys: list[tuple[Any, ...]]
+    # digests of the tracked inputs by name: (input, generation, digest)
+    input_digests: dict[str, tuple[Any, int, str]] = dataclasses.field(default_factory=dict)
+
+
+_glider_3d_states: weakref.WeakKeyDictionary[Glider, Glider3DState] = weakref.WeakKeyDictionary()
+
+
+def get_flap_data(x: np.ndarray, begin: float, amount: float) -> np.ndarray:
+    """
+    Vectorized y-offsets of pyfoil.Airfoil.add_flap
+    """
+    c1, c2, c3 = np.array([-begin**2*amount, 2*begin*amount, -amount]) / (begin**2 - 2*begin + 1)
+    dy = c1 + c2 * x + c3 * x**2
+    dy[x < begin] = 0.
+    dy[x > 1] = -amount
+
+    return dy
+
 
 @dataclass
 class ParametricGlider:
@@ -302,7 +345,36 @@ class ParametricGlider:
         
         return parsers
     
+    def get_profile_data(self, x_values: list[float]) -> np.ndarray:
+        """
+        All profiles resampled to common x-values (upper side negative)
+
+        :return: array (n_profiles, n_points, 2)
+        """
+        return np.array([profile.set_x_values(x_values).curve.tolist() for profile in self.profiles])
+
+    def get_merge_profile_data(self, factors: list[float], profile_data: np.ndarray) -> np.ndarray:
+        """
+        Vectorized version of get_merge_profile for many merge factors at once
+
+        :param profile_data: resampled profiles (see get_profile_data)
+        :return: array (n_factors, n_points, 2)
+        """
+        factors_array = np.clip(np.array(factors, dtype=float), 0, len(profile_data)-1)
+        first = np.floor(factors_array).astype(int)
+        second = np.minimum(first + 1, len(profile_data)-1)
+        k = (factors_array - first)[:, np.newaxis]
+
+        result = profile_data[first].copy()
+        result[:, :, 1] = profile_data[first, :, 1] * (1 - k) + profile_data[second, :, 1] * k
+
+        return result
+
     def get_profiles(self, num_profile: int | None=None) -> list[pyfoil.Airfoil]:
+        """
+        Merge the profiles for all ribs, merge factors, thickness factors and flaps are applied to
+        all ribs at once on the profiles resampled to the airfoil distribution.
+        """
         num_profile = num_profile or self.num_profile
 
         if num_profile is not None:
@@ -323,51 +395,70 @@ class ParametricGlider:
             rib_chords = rib_chords[1:]
 
         profile_merge_curve = euklid.vector.Interpolation(self.profile_merge_curve.get_sequence(self.num_interpolate).nodes)
-        
-        result: list[pyfoil.Airfoil] = []
+
+        merge_factors = []
+        scale_factors = []
+        flaps = []
 
         for rib_no, x_value in enumerate(x_values):
             merge_factor, scale_factor = self.tables.profile_modifiers.get_factors(rib_no)
 
-            if merge_factor is not None:
-                factor = merge_factor
-            else:
-                factor = profile_merge_curve.get_value(abs(x_value))
+            if merge_factor is None:
+                merge_factor = profile_merge_curve.get_value(abs(x_value))
 
-            profile = self.get_merge_profile(factor)
+            merge_factors.append(merge_factor)
+            scale_factors.append(1. if scale_factor is None else scale_factor)
+            flaps.append(self.tables.profile_modifiers.get_flap(rib_no))
 
+        if self.config.use_mean_profile:
+            # the arc height is applied on the original profile points, resample afterwards
+            merge_x_values = self.profiles[0].x_values
+        else:
+            merge_x_values = airfoil_distribution
 
-            if scale_factor is not None:
-                profile = profile.set_thickness(profile.thickness * scale_factor)
-            
-            if self.config.use_mean_profile:
-                assert balloonings is not None  # satisfy type-checker
-
-                if rib_no == 0 and not self.shape.has_center_cell:
-                    # center rib => use only the ballooning from the outside
-                    arc_height = [balloonings[0].get_mean_height(x) * cell_widths[0] for x in profile.x_values]
-                else:
-                    left_cell_index = rib_no
-                    if self.shape.has_center_cell:
-                        left_cell_index -= 1
-                    
-                    arc_height = [
-                        (
-                            balloonings[left_cell_index].get_mean_height(x) * cell_widths[left_cell_index] + 
-                            balloonings[left_cell_index+1].get_mean_height(x) * cell_widths[left_cell_index+1]
-                        )/2
-                        for x in profile.x_values
-                    ]
-                
-                profile = BallooningBase.apply_height_to_airfoil(profile, [x/rib_chords[rib_no] for x in arc_height])
+        profile_data = self.get_merge_profile_data(merge_factors, self.get_profile_data(merge_x_values))
+        profile_data[:, :, 1] *= np.array(scale_factors)[:, np.newaxis]
 
-            profile.name = f"Profile{rib_no+1}"
+        if not self.config.use_mean_profile:
+            x = np.abs(profile_data[:, :, 0])
+            for rib_no, flap in enumerate(flaps):
+                if flap:
+                    logger.debug(f"add flap: {flap}")
+                    profile_data[rib_no, :, 1] += get_flap_data(x[rib_no], flap["begin"], flap["amount"])
+
+        def get_profile(rib_no: int) -> pyfoil.Airfoil:
+            profile = pyfoil.Airfoil(profile_data[rib_no].tolist(), name=f"Profile{rib_no+1}")
+
+            if not self.config.use_mean_profile:
+                return profile
+
+            assert balloonings is not None  # satisfy type-checker
+
+            if rib_no == 0 and not self.shape.has_center_cell:
+                # center rib => use only the ballooning from the outside
+                arc_height = balloonings[0].get_mean_heights(profile.x_values) * cell_widths[0]
+            else:
+                left_cell_index = rib_no
+                if self.shape.has_center_cell:
+                    left_cell_index -= 1
+
+                arc_height = (
+                    balloonings[left_cell_index].get_mean_heights(profile.x_values) * cell_widths[left_cell_index] +
+                    balloonings[left_cell_index+1].get_mean_heights(profile.x_values) * cell_widths[left_cell_index+1]
+                ) / 2
+
+            profile = BallooningBase.apply_height_to_airfoil(profile, (arc_height / rib_chords[rib_no]).tolist())
 
-            if flap := self.tables.profile_modifiers.get_flap(rib_no):
+            if flap := flaps[rib_no]:
                 logger.debug(f"add flap: {flap}")
                 profile = profile.add_flap(**flap)
 
-            result.append(profile.set_x_values(airfoil_distribution))
+            profile = profile.set_x_values(airfoil_distribution)
+            profile.name = f"Profile{rib_no+1}"
+
+            return profile
+
+        result = [get_profile(rib_no) for rib_no in range(len(x_values))]
 
         if self.shape.has_center_cell:
             mirrored_profile = result[0].copy()
@@ -376,17 +467,69 @@ class ParametricGlider:
 
         return result
 
+    def get_input_digests(self, num_profile: int | None=None, known: dict[str, tuple[Any, int, str]] | None=None) -> dict[str, str]:
+        """
+        Content digests of the inputs of each stage of get_glider_3d (see glider_3d_inputs)
+
+        :param known: (optional) digests of tracked inputs from a previous call, reused while the generation
+            of the input is unchanged (config.cache_generations). Updated with the new digests.
+        """
+        digests: dict[str, str] = {}
+        values: dict[str, str] = {}
+        use_generations = known is not None and openglider.config.cache_generations
+
+        for stage, names in glider_3d_inputs.items():
+            for name in names:
+                if name in values:
+                    continue
+
+                value = recursive_getattr(self, name)
+                generation = get_generation(value) if use_generations else None
+
+                if known is not None and generation is not None:
+                    previous = known.get(name)
+                    if previous is not None and previous[0] is value and previous[1] == generation:
+                        values[name] = previous[2]
+                        continue
+
+                values[name] = openglider.jsonify.digest(value)
+
+                if known is not None and generation is not None:
+                    known[name] = (value, generation, values[name])
+
+            digests[stage] = openglider.jsonify.digest([values[name] for name in names])
+
+        profile_inputs = [digests["profiles"], num_profile or self.num_profile]
+        if self.config.use_mean_profile:
+            profile_inputs.append(digests["cells"])
+        digests["profiles"] = openglider.jsonify.digest(profile_inputs)
+
+        return digests
+
     def get_glider_3d(self, glider: Glider=None, num: int=50, num_profile: int | None=None) -> Glider:
-        """returns a new glider from parametric values"""
+        """
+        returns a new glider from parametric values
+
+        :param glider: (optional) glider to update, ribs, cells and their elements are reused where their inputs are unchanged
+        """
         logger.debug("get glider 3d")
         glider = glider or Glider()
-        ribs = []
 
         logger.debug("apply curves")
         self.rescale_curves()
         curves = self.get_curves()
         resolvers = self.resolvers
 
+        state = _glider_3d_states.get(glider)
+        # changes while generations were disabled aren't counted
+        input_digests = dict(state.input_digests) if state is not None and openglider.config.cache_generations else {}
+        inputs = self.get_input_digests(num_profile, known=input_digests)
+        old_ribs = glider.ribs
+        old_cells = glider.cells
+
+        def unchanged(stage: str) -> bool:
+            return state is not None and state.inputs[stage] == inputs[stage]
+
         x_values = self.shape.rib_x_values
         shape_ribs = self.shape.ribs
 
@@ -395,59 +538,92 @@ class ParametricGlider:
 
         arc_pos = self.arc.get_arc_positions(x_values).tolist()
         rib_angles = self.arc.get_rib_angles(x_values)
-        profiles = self.get_profiles(num_profile=num_profile)
-
-        offset_x = shape_ribs[0][0][1]
-
-        logger.info("create ribs")
 
-        for rib_no, x_value in enumerate(x_values):
-            front, back = shape_ribs[rib_no]
-            arc = arc_pos[rib_no]
-            profile = profiles[rib_no]
-
-            startpoint = euklid.vector.Vector3D([-front[1] + offset_x, arc[0], arc[1]])
+        if state is not None and unchanged("profiles") and len(state.profiles) == len(x_values):
+            profiles = state.profiles
+        else:
+            profiles = self.get_profiles(num_profile=num_profile)
 
+        def get_rib_elements(rib_no: int) -> dict[str, Any]:
             try:
                 material = self.tables.material_ribs.get(rib_no)[0]
             except (KeyError, IndexError):
                 logger.warning(f"no material set for rib: {rib_no+1}")
                 material = openglider.materials.Material.default()
 
-            chord = abs(front[1]-back[1])
-
-            sharknose = self.tables.profile_modifiers.get_sharknose(rib_no, resolvers=resolvers)
-
-            this_rib_holes = self.tables.holes.get(rib_no, resolvers=resolvers)
-            this_rigid_foils = self.tables.rigidfoils_rib.get(rib_no, resolvers=resolvers)
-
             data = {
                 "trailing_edge_extra": self.allowances.trailing_edge,
             }
             data.update(self.tables.rib_modifiers.get_rib_args(rib_no, resolvers=resolvers))
 
+            return {
+                "material": material,
+                "sharknose": self.tables.profile_modifiers.get_sharknose(rib_no, resolvers=resolvers),
+                "holes": self.tables.holes.get(rib_no, resolvers=resolvers),
+                "rigidfoils": self.tables.rigidfoils_rib.get(rib_no, resolvers=resolvers),
+                "xrot": self.tables.rib_modifiers.get_xrot(rib_no),
+                "offset": self.tables.rib_modifiers.get_offset(rib_no, resolvers=resolvers),
+                "singleskin": self.tables.rib_modifiers.get_singleskin_ribs(rib_no, resolvers=resolvers),
+                "data": data
+            }
+
+        if state is not None and unchanged("rib_elements") and len(state.rib_elements) == len(x_values):
+            rib_elements = state.rib_elements
+        else:
+            rib_elements = [get_rib_elements(rib_no) for rib_no in range(len(x_values))]
+
+        # profile scaling for the last rib (and the stabilo rib)
+        profile_factors = [1.] * len(x_values)
+        if self.config.has_stabicell:
+            profile_factors[-2] = self.config.stabi_cell_thickness
+        profile_factors[-1] *= self.config.last_profile_height
+
+        offset_x = shape_ribs[0][0][1]
+
+        logger.info("create ribs")
+
+        def get_rib(rib_no: int) -> tuple[Rib, tuple[Any, ...], bool]:
+            x_value = x_values[rib_no]
+            front, back = shape_ribs[rib_no]
+            arc = arc_pos[rib_no]
+            chord = abs(front[1]-back[1])
+            zrot = zrot_int.get_value(abs(x_value))
+
+            rib_key = (
+                inputs["profiles"], inputs["rib_elements"], inputs["ribs"],
+                front[1], arc[0], arc[1], chord, rib_angles[rib_no], aoa_values[rib_no], zrot, profile_factors[rib_no]
+            )
+
+            if state is not None and len(state.rib_keys) == len(old_ribs) == len(x_values) and state.rib_keys[rib_no] == rib_key:
+                return old_ribs[rib_no], rib_key, True
+
+            startpoint = euklid.vector.Vector3D([-front[1] + offset_x, arc[0], arc[1]])
+            profile = profiles[rib_no]
+
+            elements = rib_elements[rib_no]
+
             rib = Rib(
                 profile_2d=profile,
                 pos=startpoint,
                 chord=chord,
                 arcang=rib_angles[rib_no],
-                xrot=self.tables.rib_modifiers.get_xrot(rib_no),
-                offset=self.tables.rib_modifiers.get_offset(rib_no, resolvers=resolvers),
+                xrot=elements["xrot"],
+                offset=elements["offset"],
                 glide=self.glide,
                 aoa_absolute=aoa_values[rib_no],
-                zrot=zrot_int.get_value(abs(x_value)),
-                holes=this_rib_holes,
-                rigidfoils=this_rigid_foils,
+                zrot=zrot,
+                holes=elements["holes"],
+                rigidfoils=elements["rigidfoils"],
                 name=f"rib{rib_no}",
-                material=material,
-                sharknose=sharknose,
+                material=elements["material"],
+                sharknose=elements["sharknose"],
                 attachment_points=[],
                 seam_allowance=self.allowances.general,
-                **data  # type: ignore
+                **elements["data"]  # type: ignore
             )
             rib.set_aoa_relative(aoa_values[rib_no])
 
-            singleskin_data = self.tables.rib_modifiers.get_singleskin_ribs(rib_no, resolvers=resolvers)
+            singleskin_data = elements["singleskin"]
             if singleskin_data:
                 rib = SingleSkinRib.from_rib(rib, *singleskin_data)
             
@@ -456,16 +632,46 @@ class ParametricGlider:
                 p.get_position(rib)
             rib.attachment_points = attachment_points
 
-            ribs.append(rib)
+            return rib, rib_key, False
+
+        ribs, rib_keys, ribs_reused = zip(*[get_rib(rib_no) for rib_no in range(len(x_values))])
 
         logger.info("create cells")
 
         ballooning_factors = self.get_ballooning_merge()
-        glider.cells = []
-        for cell_no, (rib1, rib2) in enumerate(zip(ribs[:-1], ribs[1:])):
-
-            ballooning_factor = ballooning_factors[cell_no]
-            ballooning = self.merge_ballooning(*ballooning_factor)
+        cell_keys = [(inputs["cells"], *ballooning_factor) for ballooning_factor in ballooning_factors]
+        cell_keys_valid = state is not None and len(state.cell_keys) == len(old_cells) == len(ballooning_factors)
+        stabi_cell_no = len(ballooning_factors) - 1 if self.config.has_stabicell else None
+
+        def cell_unchanged(cell_no: int) -> bool:
+            return cell_keys_valid and state is not None and state.cell_keys[cell_no] == cell_keys[cell_no]
+
+        cells_reused = [
+            cell_unchanged(cell_no) and ribs_reused[cell_no] and ribs_reused[cell_no+1]
+            for cell_no in range(len(ballooning_factors))
+        ]
+
+        # the attachment points are placed on the unscaled profiles, the scaling is applied afterwards.
+        # reused ribs of new cells are unscaled again
+        scaled_ribs = []
+        for rib_no, factor in enumerate(profile_factors):
+            neighbours = cells_reused[max(rib_no-1, 0):rib_no+1]
+            if factor != 1 and not (ribs_reused[rib_no] and all(neighbours)):
+                scaled_ribs.append(rib_no)
+                if ribs_reused[rib_no]:
+                    ribs[rib_no].profile_2d = profiles[rib_no]
+
+        def get_cell(cell_no: int) -> Cell:
+            if cells_reused[cell_no]:
+                return old_cells[cell_no]
+
+            rib1, rib2 = ribs[cell_no], ribs[cell_no+1]
+
+            # the stabilo ballooning is set afterwards
+            if cell_unchanged(cell_no) and cell_no != stabi_cell_no:
+                ballooning = old_cells[cell_no].ballooning
+            else:
+                ballooning = self.merge_ballooning(*ballooning_factors[cell_no])
             
             cell = Cell(
                 rib1=rib1,
@@ -484,37 +690,56 @@ class ParametricGlider:
             for p_cell in cell.attachment_points:
                 p_cell.get_position(cell)
             
-            glider.cells.append(cell)
+            return cell
+
+        glider.cells = [get_cell(cell_no) for cell_no in range(len(ribs)-1)]
 
 
         logger.info("create cell elements")
         # CELL-ELEMENTS
-        self.get_panels(glider)
-        self.apply_diagonals(glider)
+        if state is not None and unchanged("cell_elements") and len(old_cells) == len(glider.cells):
+            for cell, old_cell in zip(glider.cells, old_cells):
+                cell.panels = old_cell.panels
+                cell.diagonals = old_cell.diagonals
+                cell.straps = old_cell.straps
+                cell.miniribs = old_cell.miniribs
+        else:
+            self.get_panels(glider)
+            self.apply_diagonals(glider)
 
-        for cell_no, cell in enumerate(glider.cells):
-            cell.miniribs = self.tables.miniribs.get(row_no=cell_no, resolvers=resolvers)
+            for cell_no, cell in enumerate(glider.cells):
+                cell.miniribs = self.tables.miniribs.get(row_no=cell_no, resolvers=resolvers)
 
         # RIB-ELEMENTS
         #self.apply_holes(glider)
-                # add stabi rib
-        if self.config.has_stabicell:
-            cell = glider.cells[-1]
+        # add stabi rib
+        if stabi_cell_no is not None and not cells_reused[stabi_cell_no]:
+            cell = glider.cells[stabi_cell_no]
             ballooning = BallooningBezierNeu([(-1,0.015), (-0.7, 0.04), (-0.2, 0.04), (0, 0.02), (0.2, 0.04), (0.7, 0.04), (1,0.015)])
             cell.ballooning = ballooning
 
-            glider.ribs[-2].profile_2d *= self.config.stabi_cell_thickness
-        
-        glider.ribs[-1].profile_2d *= self.config.last_profile_height
+        for rib_no in scaled_ribs:
+            ribs[rib_no].profile_2d = profiles[rib_no] * profile_factors[rib_no]
+
         glider.rename_parts()
 
 
         logger.info("create lineset")
-        self.tables.lines.lower_attachment_points = self.config.get_lower_attachment_points()
-        glider.lineset = self.tables.lines.get_lineset(glider, self.v_inf)
-        glider.lineset.calculate_sag = self.config.use_sag
-        glider.lineset.recalc(glider=glider)
-        glider.lineset.rename_lines()
+        if not (unchanged("lineset") and all(ribs_reused) and all(cells_reused)):
+            self.tables.lines.lower_attachment_points = self.config.get_lower_attachment_points()
+            glider.lineset = self.tables.lines.get_lineset(glider, self.v_inf)
+            glider.lineset.calculate_sag = self.config.use_sag
+            glider.lineset.recalc(glider=glider)
+            glider.lineset.rename_lines()
+
+        _glider_3d_states[glider] = Glider3DState(
+            inputs=inputs,
+            profiles=profiles,
+            rib_elements=rib_elements,
+            rib_keys=list(rib_keys),
+            cell_keys=cell_keys,
+            input_digests=input_digests
+        )
 
         return glider
 
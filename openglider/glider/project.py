@@ -13,6 +13,7 @@ from openglider.glider.parametric.import_ods import import_ods_glider
 from openglider.glider.parametric.import_freecad import import_freecad
 from openglider.glider.parametric.export_ods import export_ods_project, get_split_tables
 from openglider.utils.dataclass import dataclass, Field
+import openglider.jsonify
 import openglider.utils.table
 
 logger = logging.getLogger(__name__)
@@ -58,7 +59,13 @@ class GliderProject:
         return cls(**kwargs)
     
     def __hash__(self) -> int:
-        return hash(self.modified.timestamp)
+        return hash(self.modified.timestamp())
+
+    def get_digest(self) -> str:
+        """
+        Content hash of the parametric glider (see jsonify.digest)
+        """
+        return openglider.jsonify.digest(self.glider)
 
     @property
     def modified(self) -> datetime.datetime:
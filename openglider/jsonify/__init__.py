@@ -1,4 +1,5 @@
 from io import TextIOWrapper
+import hashlib
 import json
 import re
 import sys
@@ -12,7 +13,7 @@ from openglider.jsonify.encoder import Encoder
 from openglider.jsonify.migration import Migration
 from openglider.utils import recursive_getattr
 
-__ALL__ = ['dumps', 'dump', 'loads', 'load']
+__ALL__ = ['dumps', 'dump', 'loads', 'load', 'digest']
 
 # Main json-export routine.
 # Maybe at some point it can become necessary to de-reference classes with _module also,
@@ -107,6 +108,17 @@ def dump(obj: Any, fp: TextIOWrapper, add_meta: bool=True, pretty: bool=True) ->
     return json.dump(obj, fp, cls=Encoder, indent=indent)
 
 
+def digest(obj: Any, digest_size: int=20) -> str:
+    """
+    Deterministic content hash (BLAKE2) of an object (p.e. a ParametricGlider, GliderTables, curves or airfoils).
+    Uses the canonical json serialization (sorted keys, no metadata, integers as floats),
+    so it is equal for equal content across processes and sessions.
+    """
+    raw_data = json.loads(json.dumps(obj, cls=Encoder), parse_int=float)
+    data = json.dumps(raw_data, sort_keys=True)
+    return hashlib.blake2b(data.encode(), digest_size=digest_size).hexdigest()
+
+
 def loads(obj: str) -> Any:
     raw_data = json.loads(obj)
 
@@ -0,0 +1,477 @@
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING, Any
+
+import euklid
+import numpy as np
+import numpy.typing as npt
+import scipy.sparse
+import scipy.sparse.linalg
+
+from openglider.lines.line import Line
+from openglider.lines.node import Node
+
+if TYPE_CHECKING:
+    from openglider.lines.lineset import LineSet
+
+logger = logging.getLogger(__name__)
+
+FloatArray = npt.NDArray[np.float64]
+IntArray = npt.NDArray[np.int64]
+
+
+def normalize(vectors: FloatArray) -> tuple[FloatArray, FloatArray]:
+    """
+    normalize row-vectors, returns (normalized vectors, lengths)
+    """
+    lengths = np.linalg.norm(vectors, axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return vectors / lengths[:, None], lengths
+
+
+class LineSetArrays:
+    """
+    Struct-of-arrays representation of a LineSet.
+
+    Lines are stored in topological order (lowest lines first, then level by level),
+    so every line is stored after its lower line. Missing values (forces, init_length)
+    are stored as nan. The geometry/force/sag iteration runs on the arrays only, the
+    results are written back to the Line/Node objects with write_back().
+    """
+    def __init__(self, lines: list[Line], parents: list[int], nodes: list[Node], levels: list[IntArray], v_inf: euklid.vector.Vector3D):
+        self.lines = lines
+        self.nodes = nodes
+        self.levels = levels
+        self.line_names = [line.name for line in lines]
+
+        node_indices = {id(node): index for index, node in enumerate(nodes)}
+
+        self.parent: IntArray = np.array(parents, dtype=np.int64)
+        self.lower: IntArray = np.array([node_indices[id(line.lower_node)] for line in lines], dtype=np.int64)
+        self.upper: IntArray = np.array([node_indices[id(line.upper_node)] for line in lines], dtype=np.int64)
+
+        self.children_count: IntArray = np.bincount(self.parent[self.parent >= 0], minlength=len(lines)).astype(np.int64)
+
+        node_types = [node.node_type for node in nodes]
+        self.node_is_upper = np.array([node_type == Node.NODE_TYPE.UPPER for node_type in node_types], dtype=bool)
+        self.node_is_lower = np.array([node_type == Node.NODE_TYPE.LOWER for node_type in node_types], dtype=bool)
+        self.node_is_knot = ~(self.node_is_upper | self.node_is_lower)
+
+        self.position: FloatArray = np.array([list(node.position) for node in nodes], dtype=np.float64).reshape(-1, 3)
+        self.node_force: FloatArray = np.array([list(node.force) for node in nodes], dtype=np.float64).reshape(-1, 3)
+        self.vec_proj: FloatArray = np.array([list(node.vec_proj) for node in nodes], dtype=np.float64).reshape(-1, 3)
+
+        self.init_length: FloatArray = np.array([
+            np.nan if line.init_length is None else line.init_length.si for line in lines
+        ], dtype=np.float64)
+        self.force: FloatArray = np.array([
+            np.nan if line.force is None else line.force for line in lines
+        ], dtype=np.float64)
+        # drag per meter = drag_coefficient * v_inf^2
+        self.drag_coefficient: FloatArray = np.array([
+            0.5 * line.line_type.cw * line.line_type.thickness * line.rho_air for line in lines
+        ], dtype=np.float64)
+
+        self.sag_par_1: FloatArray = np.full(len(lines), np.nan)
+        self.sag_par_2: FloatArray = np.full(len(lines), np.nan)
+
+        # lines with a geometry to compute (knot as upper node and a length set).
+        # upper lines of a line without geometry are skipped as well
+        has_geo = self.node_is_knot[self.upper] & ~np.isnan(self.init_length)
+        for level in levels:
+            parents_level = self.parent[level]
+            has_parent = parents_level >= 0
+            has_geo[level[has_parent]] &= has_geo[parents_level[has_parent]]
+        self.calc_geo_mask = has_geo
+
+        # pairs of (line, uppermost node) for all the attachment points influencing a line
+        influence_lines: list[int] = []
+        influence_nodes: list[int] = []
+        for index in range(len(lines)-1, -1, -1):
+            upper = int(self.upper[index])
+            if self.node_is_upper[upper]:
+                influence_lines.append(index)
+                influence_nodes.append(upper)
+
+        influence_line_arr = np.array(influence_lines, dtype=np.int64)
+        influence_node_arr = np.array(influence_nodes, dtype=np.int64)
+
+        # propagate downwards (lines are sorted topologically)
+        pairs_lines = [influence_line_arr]
+        pairs_nodes = [influence_node_arr]
+        current_lines = influence_line_arr
+        current_nodes = influence_node_arr
+        while len(current_lines):
+            parents_current = self.parent[current_lines]
+            mask = parents_current >= 0
+            current_lines = parents_current[mask]
+            current_nodes = current_nodes[mask]
+            pairs_lines.append(current_lines)
+            pairs_nodes.append(current_nodes)
+
+        self.influence_line: IntArray = np.concatenate(pairs_lines)
+        self.influence_node: IntArray = np.concatenate(pairs_nodes)
+
+        self.v_inf: FloatArray = np.array(list(v_inf), dtype=np.float64)
+
+    @classmethod
+    def from_lineset(cls, lineset: LineSet, lowest_lines: list[Line] | None=None) -> LineSetArrays:
+        """
+        Create the arrays for the whole lineset or only for the trees above the given lowest lines
+        """
+        index = lineset.node_index
+
+        if lowest_lines is None:
+            lowest_lines = lineset.lowest_lines
+
+        lines: list[Line] = []
+        parents: list[int] = []
+        levels: list[IntArray] = []
+
+        current: list[tuple[Line, int]] = [(line, -1) for line in lowest_lines]
+        while current:
+            start = len(lines)
+            upper: list[tuple[Line, int]] = []
+
+            for line, parent in current:
+                line_index = len(lines)
+                lines.append(line)
+                parents.append(parent)
+
+                for upper_line in index.upper_lines.get(id(line.upper_node), []):
+                    upper.append((upper_line, line_index))
+
+            levels.append(np.arange(start, len(lines), dtype=np.int64))
+            current = upper
+
+        nodes: dict[int, Node] = {}
+        for line in lines:
+            nodes.setdefault(id(line.lower_node), line.lower_node)
+            nodes.setdefault(id(line.upper_node), line.upper_node)
+
+        return cls(lines, parents, list(nodes.values()), levels, lineset.v_inf)
+
+    def __len__(self) -> int:
+        return len(self.line_names)
+
+    def __getstate__(self) -> dict[str, Any]:
+        # only the numeric state is pickled (p.e. to solve in a process pool), see update()
+        state = self.__dict__.copy()
+        state["lines"] = []
+        state["nodes"] = []
+        return state
+
+    def update(self, other: LineSetArrays) -> None:
+        """
+        Take the state (positions, forces, sag) from another instance with the same topology
+        """
+        for attribute in ("position", "vec_proj", "force", "sag_par_1", "sag_par_2"):
+            setattr(self, attribute, getattr(other, attribute))
+
+    def copy(self) -> LineSetArrays:
+        """
+        Copy the state (positions, forces, lengths, sag), the topology is shared
+        """
+        # not copy.copy: __getstate__ drops the lines/nodes
+        new = self.__class__.__new__(self.__class__)
+        new.__dict__.update(self.__dict__)
+        for attribute in ("position", "node_force", "vec_proj", "init_length", "force", "sag_par_1", "sag_par_2", "v_inf"):
+            setattr(new, attribute, getattr(self, attribute).copy())
+
+        return new
+
+    def get_diff_vectors(self) -> tuple[FloatArray, FloatArray]:
+        return normalize(self.position[self.upper] - self.position[self.lower])
+
+    def get_residual_forces(self, diff: FloatArray) -> FloatArray:
+        """
+        residual force for every node (see LineSet.get_residual_force)
+        """
+        line_forces = diff * np.nan_to_num(self.force)[:, None]
+        residual = np.zeros_like(self.position)
+        np.add.at(residual, self.lower, line_forces)
+        np.subtract.at(residual, self.upper, line_forces)
+
+        return residual
+
+    def get_max_residual(self) -> float:
+        """
+        maximum residual force of all knots
+        """
+        diff, _ = self.get_diff_vectors()
+        residual = self.get_residual_forces(diff)[self.node_is_knot]
+
+        if not len(residual):
+            return 0.
+
+        return float(np.linalg.norm(residual, axis=1).max())
+
+    def get_influence_tangents(self, lines: IntArray) -> FloatArray:
+        """
+        direction of the lines by the forces of the influencing attachment points
+        (see Node.calc_force_infl)
+        """
+        mask = np.isin(self.influence_line, lines)
+        pair_lines = self.influence_line[mask]
+        pair_nodes = self.influence_node[mask]
+
+        direction = self.position[pair_nodes] - self.position[self.lower[pair_lines]]
+        direction_normalized, _ = normalize(direction)
+        node_force = self.node_force[pair_nodes]
+
+        projection = np.einsum("ij,ij->i", direction, node_force)
+        singular = projection**2 < 0.00001
+        if np.any(singular):
+            logger.warning(f"singular force projection for {np.count_nonzero(singular)} attachment points")
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            force = np.where(singular, 0.00001, np.einsum("ij,ij->i", node_force, node_force) / projection)
+
+        tangent = np.zeros((len(self), 3))
+        np.add.at(tangent, pair_lines, direction_normalized * force[:, None])
+
+        return normalize(tangent[lines])[0]
+
+    def calc_geo(self) -> None:
+        """
+        vectorized version of LineSet._calc_geo: each level of lines is computed at once
+        """
+        for level in self.levels:
+            lines = level[self.calc_geo_mask[level]]
+            if not len(lines):
+                continue
+
+            diff, _ = self.get_diff_vectors()
+            lower_position = self.position[self.lower[lines]]
+            upper_position = self.position[self.upper[lines]]
+
+            has_geo = (np.linalg.norm(lower_position, axis=1) + np.linalg.norm(upper_position, axis=1)) > 0
+            use_forces = has_geo & ~np.isnan(self.force[lines])
+
+            tangential = np.zeros((len(lines), 3))
+
+            if np.any(use_forces):
+                # shift the upper node by the residual force (see LineSet.get_tangential_comp)
+                residual = self.get_residual_forces(diff)
+                residual_normalized, residual_length = normalize(residual)
+
+                # see Line.get_correction_influence
+                def correction_influence(line_indices: IntArray, node_indices: IntArray) -> FloatArray:
+                    length = np.linalg.norm(diff[line_indices], axis=1)
+                    direction = diff[line_indices] / length[:, None]
+                    f = 1. - np.einsum("ij,ij->i", residual_normalized[node_indices], direction)
+                    return f * self.force[line_indices] / length
+
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    all_lines = np.arange(len(self))
+                    node_influence = np.zeros(len(self.position))
+                    np.add.at(node_influence, self.lower, correction_influence(all_lines, self.lower))
+                    np.add.at(node_influence, self.upper, correction_influence(all_lines, self.upper))
+
+                    force_lines = lines[use_forces]
+                    force_nodes = self.upper[force_lines]
+                    s = correction_influence(force_lines, force_nodes) + node_influence[force_nodes]
+
+                    r = residual[force_nodes]
+                    comp, _ = normalize(diff[force_lines] + r / s[:, None] * 0.5)
+
+                no_residual = residual_length[force_nodes] < 1e-10
+                comp[no_residual] = diff[force_lines][no_residual]
+
+                if np.any(np.isnan(comp)):
+                    raise ValueError(f"invalid comp_normalized: {[self.line_names[i] for i in force_lines[np.isnan(comp).any(axis=1)]]}")
+
+                tangential[use_forces] = comp
+
+            if not np.all(use_forces):
+                tangential[~use_forces] = self.get_influence_tangents(lines[~use_forces])
+
+            upper_new = lower_position + tangential * self.init_length[lines][:, None]
+            invalid = np.isnan(upper_new[:, 0])
+            if np.any(invalid):
+                raise ValueError(f"invalid geometry: {[self.line_names[i] for i in lines[invalid]]}")
+
+            self.position[self.upper[lines]] = upper_new
+
+    def calc_forces(self) -> None:
+        """
+        vectorized version of LineSet.calc_forces: from the uppermost level to the lowest
+        """
+        diff, _ = self.get_diff_vectors()
+        node_force_sum = np.zeros_like(self.position)
+
+        for level in self.levels[::-1]:
+            is_upper = self.node_is_upper[self.upper[level]]
+
+            # gallery lines: project the attachment point force
+            gallery = level[is_upper]
+            if len(gallery):
+                force = self.node_force[self.upper[gallery]]
+                projection = np.einsum("ij,ij->i", diff[gallery], force)
+                singular = projection**2 < 0.00001
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    gallery_force = np.einsum("ij,ij->i", force, force) / projection
+                if np.any(singular):
+                    names = [self.line_names[i] for i in gallery[singular]]
+                    logger.error(f"invalid lines: {names}")
+                    gallery_force[singular] = 10
+
+                self.force[gallery] = gallery_force
+
+            # knots: sum up the forces of the upper lines
+            knots = level[~is_upper]
+            if len(knots):
+                force = np.einsum("ij,ij->i", node_force_sum[self.upper[knots]], diff[knots])
+                if np.any(np.isnan(force)):
+                    raise ValueError(f"invalid line forces: {[self.line_names[i] for i in knots[np.isnan(force)]]}")
+                self.force[knots] = force
+
+            np.add.at(node_force_sum, self.lower[level], diff[level] * self.force[level][:, None])
+
+    def calc_projections(self) -> None:
+        v_inf = self.v_inf
+        self.vec_proj = self.position - np.outer(self.position.dot(v_inf) / v_inf.dot(v_inf), v_inf)
+
+    def calc_sag(self) -> None:
+        """
+        vectorized version of LineSet._calc_sag (sparse matrix, tree ordered)
+        """
+        self.calc_projections()
+        self.calc_forces()
+
+        count = len(self)
+        index = np.arange(count)
+        parent = self.parent
+        has_parent = parent >= 0
+        is_gallery = self.node_is_upper[self.upper]
+
+        length_projected = np.linalg.norm(self.vec_proj[self.lower] - self.vec_proj[self.upper], axis=1)
+        length = np.linalg.norm(self.position[self.upper] - self.position[self.lower], axis=1)
+        ortho_pressure = self.drag_coefficient * self.v_inf.dot(self.v_inf)
+        force_projected = self.force * length_projected / length
+
+        rows: list[IntArray] = []
+        columns: list[IntArray] = []
+        values: list[FloatArray] = []
+        rhs = np.zeros(2*count)
+
+        def insert(row: IntArray, column: IntArray, value: FloatArray | float) -> None:
+            rows.append(row)
+            columns.append(column)
+            values.append(np.broadcast_to(value, row.shape).astype(np.float64))
+
+        # lower node: fixed (offset = 0) or the offset of the lower line
+        insert(2*index+1, 2*index+1, 1.)
+        child = index[has_parent]
+        lower = parent[has_parent]
+        insert(2*child+1, 2*lower+1, -1.)
+        insert(2*child+1, 2*lower, -length_projected[lower])
+        rhs[2*child+1] = -ortho_pressure[lower] * length_projected[lower]**2 / force_projected[lower] / 2
+
+        # upper node: attachment point (fixed) or knot
+        gallery = index[is_gallery]
+        insert(2*gallery, 2*gallery, length_projected[gallery])
+        insert(2*gallery, 2*gallery+1, 1.)
+        rhs[2*gallery] = ortho_pressure[gallery] * length_projected[gallery]**2 / force_projected[gallery] / 2
+
+        knot = index[~is_gallery]
+        insert(2*knot, 2*knot, 1.)
+        rhs[2*knot] = ortho_pressure[knot] * length_projected[knot] / force_projected[knot]
+
+        knot_child = index[has_parent & ~is_gallery[np.maximum(parent, 0)]]
+        knot_parent = parent[knot_child]
+        insert(2*knot_parent, 2*knot_child, -1. / self.children_count[knot_parent])
+
+        matrix = scipy.sparse.csc_array(
+            (np.concatenate(values), (np.concatenate(rows), np.concatenate(columns))),
+            shape=(2*count, 2*count)
+            )
+        solution = scipy.sparse.linalg.spsolve(matrix, rhs)
+
+        if not np.all(np.isfinite(solution)):
+            raise np.linalg.LinAlgError("Singular sag matrix")
+
+        self.sag_par_1 = solution[0::2]
+        self.sag_par_2 = solution[1::2]
+
+    def get_lengths(self, sag: bool=True) -> FloatArray:
+        """
+        Line lengths (see Line.length_no_sag / Line.length_with_sag), lines without
+        sag parameters use the length without sag.
+        """
+        diff, length = self.get_diff_vectors()
+        if not sag:
+            return length
+
+        v_inf_0 = self.v_inf / np.linalg.norm(self.v_inf)
+        length_projected = np.linalg.norm(self.vec_proj[self.lower] - self.vec_proj[self.upper], axis=1)
+        ortho_pressure = self.drag_coefficient * self.v_inf.dot(self.v_inf)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            force_projected = self.force * length_projected / length
+            alpha = np.arcsin(diff.dot(v_inf_0))
+            q1 = ortho_pressure / force_projected / 2
+            q2 = self.sag_par_1 + np.tan(alpha)
+
+            def get_integral(dx: FloatArray) -> FloatArray:
+                value = q2 - 2*q1*dx
+                return -(np.sqrt(value**2 + 1) * value + np.arcsinh(value)) / (4*q1)
+
+            length_simple = np.sqrt(1 + q2**2) * length_projected
+            length_sag = np.where(q1 < 1e-10, length_simple, get_integral(length_projected) - get_integral(np.zeros_like(q1)))
+
+        return np.where(np.isnan(self.sag_par_1), length, length_sag)
+
+    def reset_sag(self) -> None:
+        self.sag_par_1 = np.full(len(self), np.nan)
+        self.sag_par_2 = np.full(len(self), np.nan)
+
+    def iterate(self, iterations: int, calculate_sag: bool=True, tolerance: float | None=None) -> list[float]:
+        """
+        Run the geometry/force (sag) iteration.
+
+        :param iterations: number of iterations (maximum number if a tolerance is given)
+        :param tolerance: stop as soon as the max residual force [N] is below the tolerance
+        :return: max residual force after each iteration
+        """
+        residuals = []
+        for _i in range(iterations):
+            self.calc_geo()
+            if calculate_sag:
+                self.calc_sag()
+            else:
+                self.calc_forces()
+                self.reset_sag()
+
+            residuals.append(self.get_max_residual())
+            if tolerance is not None and residuals[-1] < tolerance:
+                break
+
+        return residuals
+
+    def write_back(self) -> None:
+        """
+        Write node positions, line forces and sag parameters to the Line/Node objects
+        """
+        for node, is_knot, position, vec_proj in zip(self.nodes, self.node_is_knot, self.position.tolist(), self.vec_proj.tolist()):
+            if is_knot:
+                node.position = euklid.vector.Vector3D(position)
+            node.vec_proj = euklid.vector.Vector3D(vec_proj)
+
+        for line, force, sag_par_1, sag_par_2 in zip(self.lines, self.force.tolist(), self.sag_par_1.tolist(), self.sag_par_2.tolist()):
+            line.force = None if np.isnan(force) else force
+
+            if np.isnan(sag_par_1) or np.isnan(sag_par_2):
+                line.sag_par_1 = line.sag_par_2 = None
+            else:
+                line.sag_par_1 = sag_par_1
+                line.sag_par_2 = sag_par_2
+
+
+def iterate_arrays(arrays: LineSetArrays, iterations: int, calculate_sag: bool=True, tolerance: float | None=None) -> tuple[LineSetArrays, list[float]]:
+    """
+    LineSetArrays.iterate as a function to run in an executor (thread- or process-pool)
+    """
+    residuals = arrays.iterate(iterations, calculate_sag, tolerance)
+    return arrays, residuals
@@ -1,6 +1,8 @@
 import logging
 
 import numpy as np
+import scipy.sparse
+import scipy.sparse.linalg
 
 from openglider.lines.line import Line
 
@@ -14,16 +16,18 @@ class SagMatrix():
         self.matrix = np.zeros([size, size])
         self.rhs = np.zeros(size)
         self.solution = np.zeros(size)
-        self.line_indices: dict[Line, int] = {}
+        # lines are indexed by identity, hashing a line would hash all of its attributes
+        self.line_indices: dict[int, int] = {}
 
     def __str__(self) -> str:
         return str(self.matrix) + "\n" + str(self.rhs)
     
     def line_index(self, line: Line) -> int:
-        if line not in self.line_indices:
-            self.line_indices[line] = len(self.line_indices)
+        key = id(line)
+        if key not in self.line_indices:
+            self.line_indices[key] = len(self.line_indices)
         
-        return self.line_indices[line]
+        return self.line_indices[key]
 
     def insert_type_0_lower(self, line: Line) -> None:
         """
@@ -80,3 +84,30 @@ class SagMatrix():
             self.solution[line_nr * 2 + 1]
             )
 
+
+class SparseSagMatrix(SagMatrix):
+    """
+    Sparse version of the SagMatrix.
+
+    Every row only couples a line with its lower line or its upper lines, so there are
+    at most (2 + number of upper lines) entries per line. The entries are collected
+    in tree order (the order in which the lines are inserted) and solved as a csr-matrix,
+    which keeps the system close to banded and scales linearly with the number of lines.
+    """
+    def __init__(self, number_of_lines: int):
+        size = number_of_lines * 2
+        self.matrix = scipy.sparse.dok_array((size, size))
+        self.rhs = np.zeros(size)
+        self.solution = np.zeros(size)
+        self.line_indices: dict[int, int] = {}
+
+    def __str__(self) -> str:
+        return str(scipy.sparse.csc_array(self.matrix).toarray()) + "\n" + str(self.rhs)
+
+    def solve_system(self) -> None:
+        solution = scipy.sparse.linalg.spsolve(scipy.sparse.csc_array(self.matrix), self.rhs)
+
+        if not np.all(np.isfinite(solution)):
+            raise np.linalg.LinAlgError("Singular sag matrix")
+
+        self.solution = solution
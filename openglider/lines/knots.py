@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import csv
 import logging
+import os
 
 from openglider.lines.line_types.linetype import LineType
 
@@ -16,11 +17,16 @@ class KnotCorrections:
         ("liros.ltc65", "liros.ltc65", 2, 2.0, 2.0)
     ]
     knots_dict: dict[str, tuple[float, float]]
+    default_filename = os.path.join(os.path.dirname(__file__), "knots.csv")
+    _default: KnotCorrections | None = None
+    # compiled corrections for every line of the knot: (lower_type, upper_type, upper_num) -> corrections
+    corrections: dict[tuple[str, str, int], list[float]]
 
     def __init__(self, knots: list[knots_table_line_type] | None=None):
         if knots:
             self.knots_table = knots
         self.knots_dict = {}
+        self.corrections = {}
         
         self.update()
     
@@ -49,6 +55,15 @@ class KnotCorrections:
 
             return cls(lines)
 
+    @classmethod
+    def get_default(cls) -> KnotCorrections:
+        """
+        Get the corrections from knots.csv (read on first use)
+        """
+        if KnotCorrections._default is None:
+            KnotCorrections._default = cls.read_csv(cls.default_filename)
+
+        return KnotCorrections._default
 
     @staticmethod
     def _knot_key(line_type_1: LineType | str, line_type_2: LineType | str, upper_num: int) -> str:
@@ -60,10 +75,19 @@ class KnotCorrections:
 
     def update(self) -> None:
         self.knots_dict.clear()
+        self.corrections.clear()
         self.knots_table.sort(key=lambda x: self._knot_key(*x[:3]))
         for knot in self.knots_table:
             key = self._knot_key(*knot[:3])
             self.knots_dict[key] = knot[3:]
+            self.corrections[knot[:3]] = self._get_values(knot[3], knot[4], knot[2])
+
+    @staticmethod
+    def _get_values(first: float, last: float, upper_num: int) -> list[float]:
+        if upper_num == 1:
+            return [first]
+
+        return [(first + index * (last-first) / (upper_num-1)) * 0.001 for index in range(upper_num)]
 
     def predict(self, lower_type: LineType, upper_type: LineType, num: int) -> tuple[float, float]:
         d1_base = 6.86042156e-01
@@ -91,22 +115,18 @@ class KnotCorrections:
         )
     
     def get(self, lower_type: LineType, upper_type: LineType, upper_num: int) -> list[float]:
-        key = self._knot_key(lower_type, upper_type, upper_num)
+        return list(self.get_corrections(lower_type, upper_type, upper_num))
+
+    def get_corrections(self, lower_type: LineType, upper_type: LineType, upper_num: int) -> list[float]:
+        """
+        Get the (shared, don't modify) corrections for all upper lines of a knot.
+        Missing combinations are predicted once and added to the compiled table.
+        """
+        key = (lower_type.name, upper_type.name, upper_num)
 
-        if key not in self.knots_dict:
+        if key not in self.corrections:
             first, last = self.predict(lower_type, upper_type, upper_num)
             logger.warning(f"no shortening values for {lower_type} and {upper_type} with {upper_num} top lines. predicted: {first:.1f} -> {last:.1f}")
-        else:
-            try:
-                first = self.knots_dict[key][0]
-                last = self.knots_dict[key][1]
-            except:
-                raise Exception(f"whooot {lower_type} and {upper_type} with {upper_num} top")
-        
-        if upper_num == 1:
-            return [first]
-
-        values = [(first + index * (last-first) / (upper_num-1)) * 0.001 for index in range(upper_num)]
-        x=1
-        return values
+            self.corrections[key] = self._get_values(first, last, upper_num)
 
+        return self.corrections[key]
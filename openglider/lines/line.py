@@ -1,13 +1,16 @@
 from __future__ import annotations
 
 from typing import TYPE_CHECKING, Any
+from collections.abc import Sequence
 import logging
 import math
 
 import pydantic
 import euklid
+import numpy as np
+import numpy.typing as npt
 
-from openglider.lines.node import Node
+from openglider.lines.node import Node, mark_modified
 from openglider.lines import line_types
 from openglider.utils.cache import cached_property
 from openglider.mesh import Mesh, Vertex, Polygon
@@ -20,6 +23,14 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+# incremented whenever the nodes of a line are reassigned (invalidates LineSet.node_index)
+_topology_version = 0
+
+
+def get_topology_version() -> int:
+    return _topology_version
+
+
 
 class Line(BaseModel):
     lower_node: Node
@@ -47,6 +58,14 @@ class Line(BaseModel):
         if self.init_length is None:
             self.init_length = self.target_length
 
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        mark_modified()
+
+        if name in ("lower_node", "upper_node"):
+            global _topology_version
+            _topology_version += 1
+
     #@property
     #def color(self) -> str:
     #    return self._color or "default"
@@ -172,9 +191,7 @@ class Line(BaseModel):
         """
         Return points of the line
         """
-        if self.sag_par_1 is None or self.sag_par_2 is None:
-            sag=False
-        return [self.get_line_point(i / (numpoints - 1), sag=sag) for i in range(numpoints)]
+        return [euklid.vector.Vector3D(point) for point in get_line_points([self], numpoints, sag)[0].tolist()]
 
     def get_line_point(self, x: float, sag: bool=True) -> euklid.vector.Vector3D:
         """pos(x) [x,y,z], x: [0,1]"""
@@ -192,11 +209,21 @@ class Line(BaseModel):
              self.sag_par_1 + self.sag_par_2)
         return float(u)
 
-    def get_mesh(self, numpoints: int=2, segment_length: float | None=None) -> Mesh:
+    def get_numpoints(self, numpoints: int=2, segment_length: float | None=None) -> int:
         if segment_length is not None:
-            numpoints = max(round(self.length_no_sag / segment_length), 2)
+            return max(round(self.length_no_sag / segment_length), 2)
+
+        return numpoints
+
+    def get_mesh(self, numpoints: int=2, segment_length: float | None=None, points: npt.NDArray[np.float64] | None=None) -> Mesh:
+        """
+        :param points: precomputed line points (see get_line_points)
+        """
+        if points is None:
+            points = get_line_points([self], self.get_numpoints(numpoints, segment_length))[0]
+        numpoints = len(points)
 
-        line_points = [Vertex(*point) for point in self.get_line_points(numpoints=numpoints)]
+        line_points = [Vertex(*point) for point in points.tolist()]
         boundary: dict[str, list[Vertex]] = {"lines": []}
         if self.lower_node.node_type == Node.NODE_TYPE.LOWER:
             boundary["lower_attachment_points"] = [line_points[0]]
@@ -286,3 +313,49 @@ class Line(BaseModel):
         normed_diff_vector = diff / l
         f = 1. - normed_residual_force.dot(normed_diff_vector)   # 1 if normal, 0 if parallel
         return f * self.force / l
+
+
+def get_line_points(lines: Sequence[Line], numpoints: int=10, sag: bool=True) -> npt.NDArray[np.float64]:
+    """
+    Get the (sagged) line points of several lines at once, same as Line.get_line_points.
+    Lines without a sag calculation are straight.
+
+    :return: array of shape (len(lines), numpoints, 3)
+    """
+    x = np.linspace(0., 1., numpoints)
+
+    lower = np.array([list(line.lower_node.position) for line in lines], dtype=np.float64).reshape(-1, 3)
+    upper = np.array([list(line.upper_node.position) for line in lines], dtype=np.float64).reshape(-1, 3)
+    points = lower[:, None, :] * (1. - x)[None, :, None] + upper[:, None, :] * x[None, :, None]
+
+    if not sag:
+        return points
+
+    sag_lines = [i for i, line in enumerate(lines) if line.sag_par_1 is not None and line.sag_par_2 is not None]
+    if not sag_lines:
+        return points
+
+    v_inf = np.array([list(lines[i].v_inf) for i in sag_lines], dtype=np.float64)
+    v_inf_length = np.linalg.norm(v_inf, axis=1)
+    ortho_pressure = np.array([
+        0.5 * lines[i].line_type.cw * lines[i].line_type.thickness * lines[i].rho_air for i in sag_lines
+        ]) * v_inf_length**2
+    force = np.array([lines[i].force for i in sag_lines], dtype=np.float64)
+    sag_par_1 = np.array([lines[i].sag_par_1 for i in sag_lines], dtype=np.float64)
+    sag_par_2 = np.array([lines[i].sag_par_2 for i in sag_lines], dtype=np.float64)
+
+    lower_proj = np.array([list(lines[i].lower_node.vec_proj) for i in sag_lines], dtype=np.float64)
+    upper_proj = np.array([list(lines[i].upper_node.vec_proj) for i in sag_lines], dtype=np.float64)
+    length_projected = np.linalg.norm(upper_proj - lower_proj, axis=1)
+    length_no_sag = np.linalg.norm(upper[sag_lines] - lower[sag_lines], axis=1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # see Line.force_projected, Line.get_sag
+        force_projected = force * length_projected / length_no_sag
+        xi = x[None, :] * length_projected[:, None]
+        u = -xi**2 / 2 * (ortho_pressure / force_projected)[:, None] + xi * sag_par_1[:, None] + sag_par_2[:, None]
+        v_inf_0 = v_inf / v_inf_length[:, None]
+
+    points[sag_lines] += u[:, :, None] * v_inf_0[:, None, :]
+
+    return points
@@ -1,8 +1,5 @@
-from . import cousin
-from . import liros
-from . import edelrid
-
-from .linetype import LineType
+# the line types of the manufacturers (cousin, liros, edelrid) are loaded on first lookup
+from .linetype import LineType, load_registry
 
 LineType("default", 0, [(100., 0.)], weight=0)
 LineType("riser", 0, [(100., 0.)], weight=0)
\ No newline at end of file
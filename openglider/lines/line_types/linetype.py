@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import importlib
+
 from openglider.utils.colors import Color
 from openglider.utils.dataclass import dataclass, Field
 import logging
@@ -9,6 +11,25 @@ import euklid
 logging.getLogger(__name__)
 
 registry: dict[str, LineType] = {}
+registry_modules = ["cousin", "liros", "edelrid"]
+_registry_loaded = False
+
+
+def load_registry() -> None:
+    """
+    Import the line types of all manufacturers (registry_modules), this is done on first lookup.
+    Line types created before are kept.
+    """
+    global _registry_loaded
+    if _registry_loaded:
+        return
+
+    _registry_loaded = True
+    custom_types = registry.copy()
+    for module in registry_modules:
+        importlib.import_module(f"openglider.lines.line_types.{module}")
+    registry.update(custom_types)
+
 
 @dataclass
 class LineType:
@@ -66,6 +87,7 @@ class LineType:
         return hash(self.name)
 
     def get_similar_lines(self) -> list[LineType]:
+        load_registry()
         lines = list(registry.values())
         lines.remove(self)
         lines.sort(key=lambda line: abs(line.thickness - self.thickness))
@@ -95,7 +117,8 @@ class LineType:
 
     @classmethod
     def get(cls, name: str) -> LineType:
-        #names = 
+        if name not in registry:
+            load_registry()
         try:
             return registry[name]
         except KeyError:
@@ -120,6 +143,7 @@ class LineType:
                 </thead>
                 """
         
+        load_registry()
         sorted_types = list(registry.values())
         sorted_types.sort(key=lambda line_type: line_type.name)
         for line_type in sorted_types:
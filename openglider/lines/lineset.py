@@ -4,15 +4,20 @@ import copy
 import dataclasses
 import logging
 import math
-import os
 import re
+import time
 from typing import TYPE_CHECKING, Any, Iterable, TypeAlias, TypeVar
 from collections.abc import Callable
+from concurrent.futures import Executor
 
 import euklid
-from openglider.lines.node import Node
-from openglider.lines.line import Line
-from openglider.lines.elements import SagMatrix
+import numpy as np
+import numpy.typing as npt
+
+from openglider.lines.node import Node, get_modification_version
+from openglider.lines.line import Line, get_line_points, get_topology_version
+from openglider.lines.arrays import LineSetArrays, iterate_arrays
+from openglider.lines.elements import SagMatrix, SparseSagMatrix
 from openglider.lines.functions import proj_force
 from openglider.lines.knots import KnotCorrections
 from openglider.lines.line_types.linetype import LineType
@@ -58,6 +63,137 @@ class LineLength:
         return length
 
 
+@dataclasses.dataclass
+class ConvergenceReport:
+    """
+    Result of LineSet.recalc / LineSet.iterate_target_length
+    """
+    converged: bool = False
+    iterations: int = 0
+    # max residual force [N] of all knots after each iteration
+    residuals: list[float] = dataclasses.field(default_factory=list)
+    # max difference [m] between line length and target length per step
+    length_errors: list[float] = dataclasses.field(default_factory=list)
+    time: float = 0.
+
+    @property
+    def residual(self) -> float:
+        if not self.residuals:
+            return math.inf
+        return self.residuals[-1]
+
+    def __str__(self) -> str:
+        state = "converged" if self.converged else "not converged"
+        result = f"{state} after {self.iterations} iterations ({self.time*1000:.1f}ms), residual: {self.residual:.5f}N"
+        if self.length_errors:
+            result += f", length error: {self.length_errors[-1]*1000:.2f}mm"
+
+        return result
+
+
+@dataclasses.dataclass
+class LineSetVariant:
+    """
+    A what-if variant of a lineset for LineSet.evaluate_variants
+    """
+    name: str = ""
+    # line name -> change of init_length [m] (p.e. trimmer/accelerator)
+    length_deltas: dict[str, float] = dataclasses.field(default_factory=dict)
+    v_inf: euklid.vector.Vector3D | None = None
+    # attachment point name -> factor for the node force
+    force_scales: dict[str, float] = dataclasses.field(default_factory=dict)
+
+
+@dataclasses.dataclass
+class LineSetVariantResult:
+    variant: LineSetVariant
+    # attachment point name -> check length [m]
+    checklengths: dict[str, float]
+    # line name -> force [N]
+    forces: dict[str, float]
+    # line name -> (sag_par_1, sag_par_2)
+    sag: dict[str, tuple[float, float]]
+    convergence: ConvergenceReport
+
+
+@dataclasses.dataclass
+class NodeIndex:
+    """
+    Adjacency of the lineset graph: node -> connected lines.
+    Nodes are identified by id() as hashing a node hashes all of its attributes.
+    """
+    nodes: list[Node]
+    upper_lines: dict[int, list[Line]]
+    lower_lines: dict[int, list[Line]]
+    # line topology version at creation, see openglider.lines.line.get_topology_version
+    version: int = 0
+
+    @classmethod
+    def from_lines(cls, lines: list[Line]) -> NodeIndex:
+        nodes: dict[int, Node] = {}
+        upper_lines: dict[int, list[Line]] = {}
+        lower_lines: dict[int, list[Line]] = {}
+
+        for line in lines:
+            for node in (line.lower_node, line.upper_node):
+                nodes.setdefault(id(node), node)
+
+            upper_lines.setdefault(id(line.lower_node), []).append(line)
+            lower_lines.setdefault(id(line.upper_node), []).append(line)
+        
+        return cls(list(nodes.values()), upper_lines, lower_lines, get_topology_version())
+
+
+class LineList(list[Line]):
+    """
+    List of the lines of a LineSet, resets the node index of the lineset when modified
+    """
+    lineset: LineSet | None = None
+
+    def _changed(self) -> None:
+        # unpickling appends the items before the lineset is set
+        if self.lineset is not None:
+            self.lineset.invalidate_index()
+
+    def __setitem__(self, index: Any, value: Any) -> None:
+        super().__setitem__(index, value)
+        self._changed()
+
+    def __delitem__(self, index: Any) -> None:
+        super().__delitem__(index)
+        self._changed()
+
+    def __iadd__(self, other: Iterable[Line]) -> LineList:  # type: ignore[override, misc]
+        super().__iadd__(other)
+        self._changed()
+        return self
+
+    def append(self, line: Line) -> None:
+        super().append(line)
+        self._changed()
+
+    def extend(self, lines: Iterable[Line]) -> None:
+        super().extend(lines)
+        self._changed()
+
+    def insert(self, index: Any, line: Line) -> None:
+        super().insert(index, line)
+        self._changed()
+
+    def remove(self, line: Line) -> None:
+        super().remove(line)
+        self._changed()
+
+    def pop(self, index: Any = -1) -> Line:
+        line = super().pop(index)
+        self._changed()
+        return line
+
+    def clear(self) -> None:
+        super().clear()
+        self._changed()
+
+
 T = TypeVar('T')
 LineTreePart: TypeAlias = tuple[Line, list[T]]
 
@@ -66,14 +202,33 @@ class LineSet:
     Set of different lines
     """
     calculate_sag: bool = True
-    knot_corrections = KnotCorrections.read_csv(os.path.join(os.path.dirname(__file__), "knots.csv"))
+    # solve the sag system with a sparse matrix (linear scaling) instead of a dense one
+    sparse_sag: bool = True
+    # run recalc on the numpy representation (LineSetArrays) instead of the line/node objects
+    vectorized: bool = True
+    _knot_corrections: KnotCorrections | None = None
     mat: SagMatrix
+    convergence: ConvergenceReport | None = None
+    _lines: LineList
+    _dirty: dict[int, Line | Node]
+    _line_lengths: dict[tuple[int, bool, float], LineLength]
+    _node_checklengths: dict[tuple[bool, float], dict[int, float]]
+    _knot_positions: dict[int, tuple[int, int]]
+    _tree: list[LineTreePart] | None = None
+    _checklengths: dict[str, float] | None = None
+    _node_index: NodeIndex | None = None
+    # line/node modification version of the cached lengths (see openglider.lines.node.get_modification_version)
+    _length_cache_version: int | None = None
 
     def __init__(self, lines: list[Line], v_inf: euklid.vector.Vector3D=None):
         self._v_inf = v_inf or euklid.vector.Vector3D([0,0,0])
+        self._dirty = {}
+        self._line_lengths = {}
+        self._node_checklengths = {}
+        self._knot_positions = {}
         self.lines = lines or []
 
-        self.mat = SagMatrix(len(self.lines))
+        self.mat = self.get_sag_matrix()
         self.rename_lines()
         
 
@@ -99,6 +254,19 @@ class LineSet:
             'v_inf': self.v_inf
         }
 
+    def __getstate__(self) -> dict[str, Any]:
+        # the index and dirty elements are keyed by id() and therefore useless for a copy
+        state = self.__dict__.copy()
+        state["_node_index"] = None
+        state["_dirty"] = {}
+        state["_line_lengths"] = {}
+        state["_node_checklengths"] = {}
+        state["_knot_positions"] = {}
+        state["_tree"] = None
+        state["_checklengths"] = None
+        state["_length_cache_version"] = None
+        return state
+
     @classmethod
     def __from_json__(cls, lines: list[dict[str, Any]], nodes: list[Node], v_inf: euklid.vector.Vector3D) -> LineSet:
         lines_new = []
@@ -117,6 +285,61 @@ class LineSet:
         obj.recalc()
         return obj
 
+    @property
+    def lines(self) -> list[Line]:
+        return self._lines
+
+    @lines.setter
+    def lines(self, lines: list[Line]) -> None:
+        self._lines = LineList(lines)
+        self._lines.lineset = self
+        self.invalidate_index()
+
+    @property
+    def node_index(self) -> NodeIndex:
+        if self._node_index is None or self._node_index.version != get_topology_version():
+            self._node_index = NodeIndex.from_lines(self.lines)
+
+        return self._node_index
+
+    def invalidate_index(self) -> None:
+        """
+        Reset the node -> line adjacency index.
+        This is done automatically when LineSet.lines is modified or the nodes of a line are reassigned.
+        """
+        self._node_index = None
+        self.invalidate_lengths()
+
+    def invalidate_lengths(self) -> None:
+        """
+        Reset the cached line lengths, knot positions, check lengths and line tree.
+        This is done automatically when an attribute of a line or node is set.
+        """
+        self._line_lengths = {}
+        self._node_checklengths = {}
+        self._knot_positions = {}
+        self._tree = None
+        self._checklengths = None
+        self._length_cache_version = None
+
+    def _validate_lengths(self) -> None:
+        # the caches are shared by all exporters until a line or node changes
+        version = get_modification_version()
+        if self._length_cache_version != version:
+            self.invalidate_lengths()
+            self._length_cache_version = version
+
+    @property
+    def knot_corrections(self) -> KnotCorrections:
+        if self._knot_corrections is None:
+            return KnotCorrections.get_default()
+        return self._knot_corrections
+
+    @knot_corrections.setter
+    def knot_corrections(self, knot_corrections: KnotCorrections) -> None:
+        self._knot_corrections = knot_corrections
+        self.invalidate_lengths()
+
     @property
     def v_inf(self) -> euklid.vector.Vector3D:
         return self._v_inf
@@ -137,11 +360,7 @@ class LineSet:
 
     @property
     def nodes(self) -> list[Node]:
-        nodes = set()
-        for line in self.lines:
-            nodes.add(line.upper_node)
-            nodes.add(line.lower_node)
-        return list(nodes)
+        return list(self.node_index.nodes)
 
     def scale(self, factor: float) -> LineSet:
         for p in self.lower_attachment_points:
@@ -155,6 +374,7 @@ class LineSet:
         for node in self.nodes:
             if node.node_type == Node.NODE_TYPE.UPPER:
                 node.force *= factor ** 2
+        self.invalidate_index()
         self.recalc()
         return self
 
@@ -250,7 +470,33 @@ class LineSet:
             lines = self.get_upper_lines(self.get_main_attachment_point())
         else:
             lines = self.lines
-        return sum([line.get_mesh(numpoints, segment_length=line_segment_length) for line in lines], Mesh())
+
+        # compute the points of all lines with the same number of points at once
+        groups: dict[int, list[Line]] = {}
+        for line in lines:
+            groups.setdefault(line.get_numpoints(numpoints, line_segment_length), []).append(line)
+
+        line_points: dict[int, npt.NDArray[np.float64]] = {}
+        for group_numpoints, group in groups.items():
+            for line, points in zip(group, self.get_line_points(group_numpoints, lines=group)):
+                line_points[id(line)] = points
+
+        mesh = Mesh()
+        for line in lines:
+            mesh += line.get_mesh(points=line_points[id(line)])
+
+        return mesh
+
+    def get_line_points(self, numpoints: int=10, sag: bool=True, lines: list[Line] | None=None) -> npt.NDArray[np.float64]:
+        """
+        Get the (sagged) points of all lines (or the given lines)
+
+        :return: array of shape (len(lines), numpoints, 3)
+        """
+        if lines is None:
+            lines = self.lines
+
+        return get_line_points(lines, numpoints, sag=sag)
 
     def get_upper_line_mesh(self, numpoints: int=1, breaks: bool=False) -> Mesh:
         mesh = Mesh()
@@ -262,12 +508,21 @@ class LineSet:
             mesh += line.get_mesh(numpoints)
         return mesh
 
-    def recalc(self, glider: Glider | None=None, iterations: int=5) -> LineSet:
+    def recalc(self, glider: Glider | None=None, iterations: int=5, tolerance: float | None=None, executor: Executor | None=None) -> LineSet:
         """
         Recalculate Lineset Geometry.
         if LineSet.calculate_sag = True, drag induced sag will be calculated
-        :return: self
+
+        :param iterations: number of iterations (maximum number if a tolerance is given)
+        :param tolerance: stop as soon as the max residual force [N] of all knots is below the tolerance
+        :param executor: solve the independent line groups (risers) in a thread- or process-pool
+        :return: self (the convergence report is stored as LineSet.convergence)
         """
+        start_time = time.perf_counter()
+        report = ConvergenceReport()
+        self._dirty.clear()
+        self.invalidate_lengths()
+
         for line in self.lines:
             line.force = None
 
@@ -283,17 +538,224 @@ class LineSet:
         for line in self.lines:
             line.v_inf = self.v_inf
         
-        logger.info("calc geo")
-        for _i in range(iterations):
-            self._calc_geo()
-            if self.calculate_sag:
-                self._calc_sag()
-            else:
-                self.calc_forces(self.lowest_lines)
-                for line in self.lines:
-                    line.sag_par_1 = line.sag_par_2  = None
+        if self.vectorized:
+            self._solve_groups(self.lowest_lines, iterations, tolerance, report, executor)
+        else:
+            logger.info("calc geo")
+            for _i in range(iterations):
+                self._calc_geo()
+                if self.calculate_sag:
+                    self._calc_sag()
+                else:
+                    self.calc_forces(self.lowest_lines)
+                    for line in self.lines:
+                        line.sag_par_1 = line.sag_par_2  = None
+
+                report.iterations += 1
+                report.residuals.append(self.get_max_residual())
+                if tolerance is not None and report.residual < tolerance:
+                    report.converged = True
+                    break
+
+        if tolerance is None:
+            report.converged = True
+        elif not report.converged:
+            logger.warning(f"lineset not converged: {report}")
+
+        report.time = time.perf_counter() - start_time
+        self.convergence = report
+
+        return self
+
+    def mark_dirty(self, *elements: Line | Node) -> None:
+        """
+        Mark lines (p.e. a changed init_length, line_type or trim_correction) or nodes
+        (p.e. a moved attachment point) for recalc_dirty
+        """
+        for element in elements:
+            self._dirty[id(element)] = element
+
+        self.invalidate_lengths()
+
+    def get_lowest_lines(self, element: Line | Node) -> list[Line]:
+        """
+        Get the lowest line(s) of the tree(s) which contain the line or node
+        """
+        if isinstance(element, Line):
+            line = element
+        elif element.node_type == Node.NODE_TYPE.LOWER:
+            return self.get_upper_connected_lines(element)
+        else:
+            lower_lines = self.get_lower_connected_lines(element)
+            if not lower_lines:
+                return []
+            line = lower_lines[0]
+
+        while line.lower_node.node_type != Node.NODE_TYPE.LOWER:
+            lower_lines = self.get_lower_connected_lines(line.lower_node)
+            if not lower_lines:
+                return []
+            line = lower_lines[0]
+
+        return [line]
+
+    def recalc_dirty(self, iterations: int=5, tolerance: float | None=None, executor: Executor | None=None) -> LineSet:
+        """
+        Recalculate only the line-trees (lowest line and everything above) containing the
+        lines/nodes marked with mark_dirty. Attachment point positions are not updated.
+
+        :return: self (the convergence report is stored as LineSet.convergence)
+        """
+        if not self._dirty:
+            return self
+
+        if not self.vectorized:
+            return self.recalc(iterations=iterations, tolerance=tolerance, executor=executor)
+
+        start_time = time.perf_counter()
+        report = ConvergenceReport()
+
+        lowest_lines: dict[int, Line] = {}
+        for element in self._dirty.values():
+            for line in self.get_lowest_lines(element):
+                lowest_lines[id(line)] = line
+
+        self._dirty.clear()
+        self.invalidate_lengths()
+
+        for line in self.lines:
+            line.v_inf = self.v_inf
+
+        self._solve_groups(list(lowest_lines.values()), iterations, tolerance, report, executor)
+
+        if tolerance is None:
+            report.converged = True
+        elif not report.converged:
+            logger.warning(f"lineset not converged: {report}")
+
+        report.time = time.perf_counter() - start_time
+        self.convergence = report
+
         return self
 
+    def get_arrays(self) -> LineSetArrays:
+        return LineSetArrays.from_lineset(self)
+
+    def get_independent_groups(self, lowest_lines: list[Line] | None=None) -> list[list[Line]]:
+        """
+        Split the lowest lines into groups which can be solved independently:
+        every lowest line (riser) together with all lines above is a separate tree.
+        """
+        if lowest_lines is None:
+            lowest_lines = self.lowest_lines
+
+        return [[line] for line in lowest_lines]
+
+    def _solve_groups(self, lowest_lines: list[Line], iterations: int, tolerance: float | None, report: ConvergenceReport, executor: Executor | None=None) -> None:
+        logger.info("calc geo (vectorized)")
+        if executor is None:
+            # the sag matrix is block-diagonal anyway, one solve for all trees is faster
+            groups = [LineSetArrays.from_lineset(self, lowest_lines)]
+        else:
+            groups = [LineSetArrays.from_lineset(self, group) for group in self.get_independent_groups(lowest_lines)]
+
+        for arrays in groups:
+            arrays.force[:] = np.nan
+
+        if executor is None:
+            results = [iterate_arrays(arrays, iterations, self.calculate_sag, tolerance) for arrays in groups]
+        else:
+            futures = [executor.submit(iterate_arrays, arrays, iterations, self.calculate_sag, tolerance) for arrays in groups]
+            results = [future.result() for future in futures]
+
+        histories = []
+        for arrays, (result, residuals) in zip(groups, results):
+            # processpools return a copy
+            arrays.update(result)
+            arrays.write_back()
+            histories.append(residuals)
+
+        if histories:
+            report.iterations = max(len(residuals) for residuals in histories)
+            for i in range(report.iterations):
+                report.residuals.append(max(residuals[min(i, len(residuals)-1)] for residuals in histories))
+
+        if tolerance is not None and report.residual < tolerance:
+            report.converged = True
+
+    def evaluate_variants(self, variants: list[LineSetVariant], iterations: int=5, tolerance: float | None=None, pre_load: float=50) -> list[LineSetVariantResult]:
+        """
+        Evaluate several variants (line length changes, speed, attachment point forces)
+        of the lineset. All variants share the topology of the lineset, neither the lineset
+        nor the lines are modified.
+        """
+        base = self.get_arrays()
+        line_indices = {line.name: index for index, line in enumerate(base.lines)}
+        node_indices = {node.name: index for index, node in enumerate(base.nodes)}
+
+        # corrections which don't depend on the geometry
+        corrections = np.array([
+            self.get_line_length(line).loop_correction + self.get_line_length(line).manual_correction
+            for line in base.lines
+        ])
+        names = list(self.get_checklengths())
+        leaves = np.flatnonzero(base.children_count == 0)
+
+        results = []
+        for variant in variants:
+            start_time = time.perf_counter()
+            report = ConvergenceReport()
+            arrays = base.copy()
+
+            for line_name, delta in variant.length_deltas.items():
+                arrays.init_length[line_indices[line_name]] += delta
+            for node_name, factor in variant.force_scales.items():
+                arrays.node_force[node_indices[node_name]] *= factor
+            if variant.v_inf is not None:
+                arrays.v_inf = np.array(list(variant.v_inf), dtype=np.float64)
+
+            arrays.force[:] = np.nan
+            arrays.reset_sag()
+
+            self._iterate_arrays(arrays, iterations, tolerance, report)
+            if tolerance is None:
+                report.converged = True
+            report.time = time.perf_counter() - start_time
+
+            # check lengths: cumulative stretched lengths from the lowest lines upwards
+            stretch = np.array([
+                line.line_type.get_stretch_factor(pre_load) / line.line_type.get_stretch_factor(0 if np.isnan(force) else force)
+                for line, force in zip(base.lines, arrays.force.tolist())
+            ])
+            lengths = arrays.get_lengths(sag=self.calculate_sag) * stretch + corrections
+            cumulative = np.zeros(len(base))
+            for level in base.levels:
+                parents = base.parent[level]
+                cumulative[level] = lengths[level] + np.where(parents >= 0, cumulative[np.maximum(parents, 0)], 0.)
+
+            leaf_lengths = {base.nodes[base.upper[i]].name: float(cumulative[i]) for i in leaves}
+
+            results.append(LineSetVariantResult(
+                variant=variant,
+                checklengths={name: leaf_lengths[name] for name in names if name in leaf_lengths},
+                forces={line.name: force for line, force in zip(base.lines, arrays.force.tolist())},
+                sag={
+                    line.name: (sag_1, sag_2)
+                    for line, sag_1, sag_2 in zip(base.lines, arrays.sag_par_1.tolist(), arrays.sag_par_2.tolist())
+                    },
+                convergence=report
+            ))
+
+        return results
+
+    def _iterate_arrays(self, arrays: LineSetArrays, iterations: int, tolerance: float | None, report: ConvergenceReport) -> None:
+        residuals = arrays.iterate(iterations, self.calculate_sag, tolerance)
+
+        report.iterations += len(residuals)
+        report.residuals += residuals
+        if tolerance is not None and report.residual < tolerance:
+            report.converged = True
+
     def _calc_geo(self, start: list[Line] | None=None) -> None:
         if start is None:
             start_lines = self.lowest_lines
@@ -317,7 +779,7 @@ class LineSet:
         if start is None:
             start = self.lowest_lines
         # 0 every line calculates its parameters
-        self.mat = SagMatrix(len(self.lines))
+        self.mat = self.get_sag_matrix()
 
         # calculate projections
         for n in self.nodes:
@@ -331,6 +793,12 @@ class LineSet:
             l.sag_par_1, l.sag_par_2 = self.mat.get_sag_parameters(l)
 
     # -----CALCULATE SAG-----#
+    def get_sag_matrix(self) -> SagMatrix:
+        if self.sparse_sag:
+            return SparseSagMatrix(len(self.lines))
+
+        return SagMatrix(len(self.lines))
+
     def _calc_matrix_entries(self, line: Line) -> None:
         up = self.get_upper_connected_lines(line.upper_node)
         if line.lower_node.node_type == Node.NODE_TYPE.LOWER:
@@ -385,7 +853,7 @@ class LineSet:
                     line_lower.force = force_projected
 
     def get_upper_connected_lines(self, node: Node) -> list[Line]:
-        return [line for line in self.lines if line.lower_node is node]
+        return list(self.node_index.upper_lines.get(id(node), []))
 
     def get_upper_lines(self, node: Node) -> list[Line]:
         """
@@ -400,7 +868,7 @@ class LineSet:
         return lines
 
     def get_lower_connected_lines(self, node: Node) -> list[Line]:
-        return [line for line in self.lines if line.upper_node is node]
+        return list(self.node_index.lower_lines.get(id(node), []))
 
     def get_connected_lines(self, node: Node) -> list[Line]:
         return self.get_upper_connected_lines(node) + self.get_lower_connected_lines(node)
@@ -498,18 +966,52 @@ class LineSet:
                 result += self.get_upper_influence_nodes(line=upper_line)
             return result
 
-    def iterate_target_length(self, steps: int=10, pre_load: float=50) -> None:
+    def iterate_target_length(self, steps: int=10, pre_load: float=50, tolerance: float | None=None, residual_tolerance: float | None=None, iterations: int=5) -> ConvergenceReport:
         """
         iterative method to satisfy the target length
+
+        :param steps: number of steps (maximum number if a tolerance is given)
+        :param tolerance: stop as soon as the max length error [m] of all lines is below the tolerance
+        :param residual_tolerance: tolerance [N] passed to recalc
+        :param iterations: (max) iterations per recalc
         """
         # TODO: use pre_load
-        self.recalc()
+        start_time = time.perf_counter()
+        report = ConvergenceReport()
+
+        def recalc() -> None:
+            self.recalc(iterations=iterations, tolerance=residual_tolerance)
+            assert self.convergence is not None
+            report.iterations += self.convergence.iterations
+            report.residuals += self.convergence.residuals
+
+        recalc()
         for _ in range(steps):
+            diffs: list[tuple[Line, float]] = []
             for l in self.lines:
                 if l.target_length is not None and l.init_length is not None:
-                    diff = self.get_line_length(l).get_length() - l.target_length.si
-                    l.init_length -= diff
-            self.recalc()
+                    diffs.append((l, self.get_line_length(l).get_length() - l.target_length.si))
+
+            report.length_errors.append(max([abs(diff) for _, diff in diffs], default=0.))
+            if tolerance is not None and report.length_errors[-1] < tolerance:
+                break
+
+            for l, diff in diffs:
+                assert l.init_length is not None
+                l.init_length -= diff
+            recalc()
+
+        length_converged = tolerance is None or (len(report.length_errors) > 0 and report.length_errors[-1] < tolerance)
+        residual_converged = residual_tolerance is None or report.residual < residual_tolerance
+        report.converged = length_converged and residual_converged
+
+        if not report.converged:
+            logger.warning(f"target length iteration not converged: {report}")
+
+        report.time = time.perf_counter() - start_time
+        self.convergence = report
+
+        return report
 
     @property
     def total_length(self) -> float:
@@ -580,12 +1082,16 @@ class LineSet:
 
     def create_tree(self, start_nodes: list[Node] | None=None) -> list[LineTreePart]:
         """
-        Create a tree of lines
+        Create a tree of lines (the tree of the whole lineset is cached)
         :return: [(line, [(upper_line1, []),...]),(...)]
         """
         # TODO: REMOVE
         if start_nodes is None:
-            start_nodes = self.lower_attachment_points
+            self._validate_lengths()
+            if self._tree is None:
+                self._tree = self.create_tree(self.lower_attachment_points)
+
+            return self._tree
 
         lines = []
         for node in start_nodes:
@@ -665,9 +1171,34 @@ class LineSet:
             for i, line in enumerate(lines_sorted):
                 line.name = f"{prefix}{i+1:02d}"
 
+        self.invalidate_lengths()
+
         return self
     
     def get_line_length(self, line: Line, with_sag: bool=True, pre_load: float = 50) -> LineLength:
+        """
+        Get the length of a line including all corrections (cached until a line or node changes)
+        """
+        self._validate_lengths()
+        key = (id(line), with_sag, pre_load)
+        if key not in self._line_lengths:
+            self._line_lengths[key] = self._get_line_length(line, with_sag, pre_load)
+
+        return self._line_lengths[key]
+
+    def get_knot_position(self, line: Line) -> tuple[int, int]:
+        """
+        Get the index of a line within the sorted upper lines of its lower node
+        and the number of those lines (cached until a line or node changes)
+        """
+        self._validate_lengths()
+        if id(line) not in self._knot_positions:
+            upper_lines = self.sort_lines(self.get_upper_connected_lines(line.lower_node), by_names=True)
+            self._knot_positions.update({id(upper_line): (line_no, len(upper_lines)) for line_no, upper_line in enumerate(upper_lines)})
+
+        return self._knot_positions[id(line)]
+
+    def _get_line_length(self, line: Line, with_sag: bool, pre_load: float) -> LineLength:
         loop_correction = 0.
         # reduce by canopy-loop length / brake offset
         if len(self.get_upper_connected_lines(line.upper_node)) == 0:
@@ -681,12 +1212,9 @@ class LineSet:
 
         if len(lower_lines) > 0:
             lower_line = lower_lines[0] # Todo: Reinforce
-            upper_lines = self.sort_lines(self.get_upper_connected_lines(line.lower_node), by_names=True)
-
-            line_no = upper_lines.index(line)
-            total_lines = len(upper_lines)
+            line_no, total_lines = self.get_knot_position(line)
 
-            knot_correction = self.knot_corrections.get(lower_line.line_type, line.line_type, total_lines)[line_no]
+            knot_correction = self.knot_corrections.get_corrections(lower_line.line_type, line.line_type, total_lines)[line_no]
 
         trim_correction = 0.
         if line.trim_correction is not None:
@@ -737,26 +1265,57 @@ class LineSet:
 
         return length_table
     
+    def get_node_checklengths(self, with_sag: bool=True, pre_load: float = 50) -> dict[int, float]:
+        """
+        Cumulative check length for every node (by id(node)), computed in one pass
+        from the lower attachment points upwards.
+        """
+        self._validate_lengths()
+        key = (with_sag, pre_load)
+        if key not in self._node_checklengths:
+            lengths: dict[int, float] = {}
+            index = self.node_index
+            nodes = self.lower_attachment_points
+
+            for node in nodes:
+                lengths[id(node)] = 0.
+
+            while nodes:
+                upper_nodes = []
+                for node in nodes:
+                    for line in index.upper_lines.get(id(node), []):
+                        line_length = self.get_line_length(line, with_sag, pre_load).get_checklength()
+                        lengths[id(line.upper_node)] = lengths[id(node)] + line_length
+                        upper_nodes.append(line.upper_node)
+
+                nodes = upper_nodes
+
+            self._node_checklengths[key] = lengths
+
+        return self._node_checklengths[key]
+
     def get_checklengths(self) -> dict[str, float]:
-        def get_checklength(line: Line, upper_lines: Any) -> list[tuple[str, float]]:
-            line_length = self.get_line_length(line).get_checklength()
-            
-            if not len(upper_lines):
-                return [(line.upper_node.name, line_length)]
-            else:
+        self._validate_lengths()
+        if self._checklengths is None:
+            node_lengths = self.get_node_checklengths()
+
+            def get_checklength(line: Line, upper_lines: list[LineTreePart]) -> list[tuple[str, float]]:
+                if not len(upper_lines):
+                    return [(line.upper_node.name, node_lengths[id(line.upper_node)])]
+
                 lengths = []
                 for upper in upper_lines:
                     lengths += get_checklength(*upper)
-                
-                return [
-                    (name, length + line_length) for name, length in lengths
-                ]
-        
-        checklength_values = []
-        for line, upper_line in self.create_tree():
-            checklength_values += get_checklength(line, upper_line)
 
-        return dict(checklength_values)
+                return lengths
+
+            checklength_values = []
+            for line, upper_line in self.create_tree():
+                checklength_values += get_checklength(line, upper_line)
+
+            self._checklengths = dict(checklength_values)
+
+        return self._checklengths.copy()
 
     def get_checksheet(self) -> Table:
         lengths = list(self.get_checklengths().items())
@@ -839,6 +1398,16 @@ class LineSet:
                 force += line.diff_vector * line.force
         return force
 
+    def get_max_residual(self) -> float:
+        """
+        maximum residual force of all knots
+        """
+        residuals = [
+            self.get_residual_force(node).length() for node in self.nodes if node.node_type == Node.NODE_TYPE.KNOT
+        ]
+
+        return max(residuals, default=0.)
+
     def get_residual_force(self, node: Node) -> euklid.vector.Vector3D:
         '''
         compute the residual force in a node to due simplified computation of lines
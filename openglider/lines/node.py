@@ -12,6 +12,19 @@ from openglider.utils.dataclass import BaseModel, Field
 
 logger = logging.getLogger(__name__)
 
+# incremented whenever an attribute of a line or node is set (invalidates the LineSet length caches)
+_modification_version = 0
+
+
+def get_modification_version() -> int:
+    return _modification_version
+
+
+def mark_modified() -> None:
+    global _modification_version
+    _modification_version += 1
+
+
 class NODE_TYPE_ENUM(enum.Enum):
     LOWER = 0
     KNOT = 1
@@ -26,6 +39,10 @@ class Node(BaseModel):
     position: euklid.vector.Vector3D = Field(default_factory=lambda: euklid.vector.Vector3D())
     vec_proj: euklid.vector.Vector3D = Field(default_factory=lambda: euklid.vector.Vector3D())
     name: str = "unnamed_node"
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        mark_modified()
     
     def __json__(self) -> dict[str, Any]:
         return{
@@ -1,9 +1,17 @@
 from __future__ import annotations
 import collections
+import itertools
 import logging
+import os
+import pickle
+import uuid
+import weakref
+from concurrent.futures import Executor, ProcessPoolExecutor
 from typing import Any, TypeAlias
+from collections.abc import Iterator
 from openglider.glider.cell.cell import Cell
 from openglider.glider.glider import Glider
+from openglider.glider.rib.rib import Rib
 from openglider.utils.config import Config
 
 from openglider.vector.drawing import Layout
@@ -19,6 +27,36 @@ logger = logging.getLogger(__name__)
 
 PlotPartDict = collections.OrderedDict[Cell, list[PlotPart]]
 
+
+# plotmaker of a worker process (PlotMaker.get_executor) by token
+_worker_plotmaker: tuple[str, PlotMaker] | None = None
+
+
+def _load_plotmaker(data: bytes) -> tuple[str, PlotMaker]:
+    cls, glider_3d, config, token = pickle.loads(data)
+    return token, cls(glider_3d, config)
+
+
+def _init_worker(data: bytes) -> None:
+    # unpickle once per worker, the cellplotmakers are reused for all tasks
+    global _worker_plotmaker
+    _worker_plotmaker = _load_plotmaker(data)
+
+
+def _call_plotmaker(args: tuple[str, str, int]) -> Any:
+    token, method, index = args
+    if _worker_plotmaker is None or _worker_plotmaker[0] != token:
+        raise RuntimeError("worker is not initialized for this plotmaker (use PlotMaker.get_executor)")
+
+    return getattr(_worker_plotmaker[1], method)(index)
+
+
+def _call_plotmaker_chunk(args: tuple[bytes, str, list[int]]) -> list[Any]:
+    data, method, indices = args
+    _token, plotmaker = _load_plotmaker(data)
+    return [getattr(plotmaker, method)(index) for index in indices]
+
+
 class PlotMaker:
     glider_3d: Glider
     config: PatternConfig
@@ -49,6 +87,9 @@ class PlotMaker:
         self.miniribs = collections.OrderedDict()
         self.extra_parts: list[PlotPart] = []
         self._cellplotmakers: dict[Cell, DefaultCellPlotMaker] = dict()
+        self._worker_data: bytes | None = None
+        self._worker_token = uuid.uuid4().hex
+        self._executors: weakref.WeakSet[Executor] = weakref.WeakSet()
 
         self.weight: dict[str, MaterialUsage] = {}
 
@@ -79,27 +120,75 @@ class PlotMaker:
 
         return self._cellplotmakers[cell]
 
-    def get_panels(self) -> Layout:
-        self.panels.clear()
-        panels_upper: list[Layout | PlotPart] = []
-        panels_lower: list[Layout | PlotPart] = []
-
+    def _get_worker_data(self) -> bytes:
+        if self._worker_data is None:
+            self._worker_data = pickle.dumps((self.__class__, self.glider_3d, self.config, self._worker_token))
+
+        return self._worker_data
+
+    def get_executor(self, max_workers: int | None=None) -> ProcessPoolExecutor:
+        """
+        A process-pool for the get_/iter_ methods, the plotmaker is sent to each worker once at startup
+        """
+        executor = ProcessPoolExecutor(max_workers, initializer=_init_worker, initargs=(self._get_worker_data(),))
+        self._executors.add(executor)
+
+        return executor
+
+    def _map(self, method: str, indices: list[int], executor: Executor | None) -> Iterator[Any]:
+        """
+        Call a method with each index, in parallel if an executor is given.
+        The results are returned in the order of the indices as they get ready.
+        Workers of an executor from get_executor only receive (method, index),
+        other executors get the pickled plotmaker with one chunk of indices per worker.
+        """
+        if executor is None:
+            return (getattr(self, method)(index) for index in indices)
+
+        if executor in self._executors:
+            return executor.map(_call_plotmaker, [(self._worker_token, method, index) for index in indices])
+
+        workers = getattr(executor, "_max_workers", None) or os.cpu_count() or 1
+        chunk_size = max(1, -(-len(indices) // workers))
+        chunks = [indices[i:i+chunk_size] for i in range(0, len(indices), chunk_size)]
+        data = self._get_worker_data()
+
+        return itertools.chain.from_iterable(executor.map(_call_plotmaker_chunk, [(data, method, chunk) for chunk in chunks]))
+
+    def _get_cell_panels(self, cell_no: int) -> tuple[list[PlotPart], list[PlotPart], MaterialUsage]:
+        logger.info(f"Plotting Cell: {cell_no}")
+        pm = self._get_cellplotmaker(self.glider_3d.cells[cell_no])
+        lower = pm.get_panels_lower()
+        upper = pm.get_panels_upper()
+
+        return lower, upper, pm.consumption
+
+    def iter_panels(self, executor: Executor | None=None) -> Iterator[tuple[Cell, list[PlotPart], list[PlotPart]]]:
+        """
+        Yield (cell, lower, upper) panels cell by cell, the material usage is set when done
+        """
         weight = MaterialUsage()
+        cell_panels = self._map("_get_cell_panels", list(range(len(self.glider_3d.cells))), executor)
 
-        for cell_no, cell in enumerate(self.glider_3d.cells):
-            logger.info(f"Plotting Cell: {cell_no}")
-            pm = self._get_cellplotmaker(cell)
-            lower = pm.get_panels_lower()
-            upper = pm.get_panels_upper()
-            panels_lower.append(Layout.stack_column(lower, self.config.patterns_align_dist_y))
-            panels_upper.append(Layout.stack_column(upper, self.config.patterns_align_dist_y))
-
-            panel_weight = pm.consumption
+        for cell_no, (lower, upper, panel_weight) in enumerate(cell_panels):
             if cell_no > 0 or not self.glider_3d.has_center_cell:
                 panel_weight *= 2
 
             weight += panel_weight
 
+            yield self.glider_3d.cells[cell_no], lower, upper
+
+        self.weight["panels"] = weight
+
+    def get_panels(self, executor: Executor | None=None) -> Layout:
+        self.panels.clear()
+        panels_upper: list[Layout | PlotPart] = []
+        panels_lower: list[Layout | PlotPart] = []
+
+        for _cell, lower, upper in self.iter_panels(executor):
+            panels_lower.append(Layout.stack_column(lower, self.config.patterns_align_dist_y))
+            panels_upper.append(Layout.stack_column(upper, self.config.patterns_align_dist_y))
+
 
         if self.config.layout_seperate_panels:
             layout_lower = Layout.stack_row(panels_lower, self.config.patterns_align_dist_x)
@@ -111,81 +200,113 @@ class PlotMaker:
         else:
             self.panels = Layout.stack_grid([panels_upper, panels_lower], self.config.patterns_align_dist_x, self.config.patterns_align_dist_y)
 
-        self.weight["panels"] = weight
-
         return self.panels
 
-    def get_ribs(self, rotate: bool=False) -> None:
+    def _get_rib(self, rib_no: int) -> tuple[PlotPart, list[PlotPart], MaterialUsage]:
         from openglider.glider.rib.singleskin import SingleSkinRib
 
+        rib = self.glider_3d.ribs[rib_no]
+        rib_plot: SingleSkinRibPlot | RibPlot
+        if isinstance(rib, SingleSkinRib):
+            rib_plot = self.SingleSkinRibPlot(rib, self.config)
+        else:
+            rib_plot = self.RibPlot(rib, self.config)
+
+        logger.debug(f"ribplot: {rib_plot}")
+        rib_plot.flatten(self.glider_3d)
+
+        extra_parts: list[PlotPart] = []
+        for hole in rib.holes:
+            extra_parts += hole.get_parts(rib)
+
+        return rib_plot.plotpart, extra_parts, rib_plot.weight
+
+    def iter_ribs(self, executor: Executor | None=None) -> Iterator[tuple[Rib, PlotPart]]:
+        """
+        Yield (rib, plotpart) rib by rib, the material usage is set when done
+        """
         weight = MaterialUsage()
-        self.ribs = []
+
+        rib_numbers = []
         for rib_no, rib in enumerate(self.glider_3d.ribs):
             if rib_no == 0 and self.glider_3d.has_center_cell:
                 continue
 
             if rib.profile_2d.thickness < 1e-5:
                 continue
-            
-            rib_plot: SingleSkinRibPlot | RibPlot
-            if isinstance(rib, SingleSkinRib):
-                rib_plot = self.SingleSkinRibPlot(rib, self.config)
-            else:
-                rib_plot = self.RibPlot(rib, self.config)
-
-            print("ribplot: ", rib_plot)
-            rib_plot.flatten(self.glider_3d)
-
-            for hole in rib.holes:
-                self.extra_parts += hole.get_parts(rib)
-
-            rib_weight = rib_plot.weight
-            if rib_no == 0:
-                if self.glider_3d.has_center_cell:
-                    rib_weight = MaterialUsage()
-            else:
+
+            rib_numbers.append(rib_no)
+
+        for rib_no, (plotpart, extra_parts, rib_weight) in zip(rib_numbers, self._map("_get_rib", rib_numbers, executor)):
+            self.extra_parts += extra_parts
+
+            if rib_no != 0:
                 rib_weight *= 2
             
             weight += rib_weight
 
-            if rotate:
-                rib_plot.plotpart.rotate(-90, radians=False)
-            self.ribs.append(rib_plot.plotpart)
+            yield self.glider_3d.ribs[rib_no], plotpart
         
         self.weight["ribs"] = weight
 
-    def get_dribs(self) -> PlotPartDict:
-        self.dribs.clear()
-        weight = MaterialUsage()
+    def get_ribs(self, rotate: bool=False, executor: Executor | None=None) -> None:
+        self.ribs = []
 
-        for cell in self.glider_3d.cells:
-            # missing attachmentpoints []
-            pm = self._get_cellplotmaker(cell)
-            dribs = pm.get_dribs()
-            self.dribs[cell] = dribs[:]
+        for _rib, plotpart in self.iter_ribs(executor):
+            if rotate:
+                plotpart.rotate(-90, radians=False)
+            self.ribs.append(plotpart)
 
-            weight += pm.consumption_drib *2
+    def _get_cell_dribs(self, cell_no: int) -> tuple[list[PlotPart], MaterialUsage]:
+        # missing attachmentpoints []
+        pm = self._get_cellplotmaker(self.glider_3d.cells[cell_no])
+        dribs = pm.get_dribs()
 
+        return dribs[:], pm.consumption_drib
+
+    def iter_dribs(self, executor: Executor | None=None) -> Iterator[tuple[Cell, list[PlotPart]]]:
+        weight = MaterialUsage()
+
+        cell_dribs = self._map("_get_cell_dribs", list(range(len(self.glider_3d.cells))), executor)
+        for cell, (dribs, drib_weight) in zip(self.glider_3d.cells, cell_dribs):
+            weight += drib_weight *2
+            yield cell, dribs
 
         self.weight["dribs"] = weight
 
+    def get_dribs(self, executor: Executor | None=None) -> PlotPartDict:
+        self.dribs.clear()
+
+        for cell, dribs in self.iter_dribs(executor):
+            self.dribs[cell] = dribs
+
         return self.dribs
 
-    def get_straps(self) -> collections.OrderedDict[tuple[list[PlotPart], list[PlotPart]]]:
-        self.straps.clear()
+    def _get_cell_straps(self, cell_no: int) -> tuple[list[PlotPart], list[PlotPart], MaterialUsage]:
+        # missing attachmentpoints []
+        pm = self._get_cellplotmaker(self.glider_3d.cells[cell_no])
+        upper, lower = pm.get_straps()
+
+        return upper, lower, pm.consumption_straps
+
+    def iter_straps(self, executor: Executor | None=None) -> Iterator[tuple[Cell, list[PlotPart], list[PlotPart]]]:
         weight = MaterialUsage()
 
-        for cell in self.glider_3d.cells:
-            # missing attachmentpoints []
-            pm = self._get_cellplotmaker(cell)
-            upper, lower = pm.get_straps()
+        cell_straps = self._map("_get_cell_straps", list(range(len(self.glider_3d.cells))), executor)
+        for cell, (upper, lower, straps_weight) in zip(self.glider_3d.cells, cell_straps):
+            weight += straps_weight *2
+            yield cell, upper, lower
+
+        self.weight["straps"] = weight
+
+    def get_straps(self, executor: Executor | None=None) -> collections.OrderedDict[tuple[list[PlotPart], list[PlotPart]]]:
+        self.straps.clear()
+
+        for cell, upper, lower in self.iter_straps(executor):
             self.straps[cell] = (
                 upper,
                 lower
             )
-            weight += pm.consumption_straps *2
-
-        self.weight["straps"] = weight
 
         return self.straps
 
@@ -199,20 +320,93 @@ class PlotMaker:
         
         return self.rigidfoils
     
-    def get_miniribs(self) -> PlotPartDict:
-        self.miniribs.clear()
+    def _get_cell_miniribs(self, cell_no: int) -> tuple[list[PlotPart], MaterialUsage]:
+        pm = self._get_cellplotmaker(self.glider_3d.cells[cell_no])
+        miniribs = pm.get_miniribs()
+
+        return miniribs, pm.consumption_mribs
+
+    def iter_miniribs(self, executor: Executor | None=None) -> Iterator[tuple[Cell, list[PlotPart]]]:
         weight = MaterialUsage()
 
-        for cell in self.glider_3d.cells:
-            pm = self._get_cellplotmaker(cell)
-            miniribs = pm.get_miniribs()
-            self.miniribs[cell] = miniribs
-            weight += pm.consumption_mribs *2
+        cell_miniribs = self._map("_get_cell_miniribs", list(range(len(self.glider_3d.cells))), executor)
+        for cell, (miniribs, mribs_weight) in zip(self.glider_3d.cells, cell_miniribs):
+            weight += mribs_weight *2
+            yield cell, miniribs
 
         self.weight["mribs"] = weight
 
+    def get_miniribs(self, executor: Executor | None=None) -> PlotPartDict:
+        self.miniribs.clear()
+
+        for cell, miniribs in self.iter_miniribs(executor):
+            self.miniribs[cell] = miniribs
+
         return self.miniribs
 
+    def _get_cell_parts(self, cell_no: int) -> tuple[dict[str, list[PlotPart]], dict[str, MaterialUsage]]:
+        """
+        All parts of a cell (panels, dribs, straps, rigidfoils, miniribs) and their material usage,
+        the cellplotmaker (and its flattened cell) is dropped afterwards
+        """
+        cell = self.glider_3d.cells[cell_no]
+        pm = self._get_cellplotmaker(cell)
+
+        try:
+            panels = pm.get_panels_upper() + pm.get_panels_lower()
+            dribs = pm.get_dribs()[:]
+            straps_upper, straps_lower = pm.get_straps()
+
+            parts = {
+                "panels": panels,
+                "dribs": dribs,
+                "straps": straps_upper + straps_lower,
+                "rigidfoils": pm.get_rigidfoils(),
+                "miniribs": pm.get_miniribs()
+            }
+            weights = {
+                "panels": pm.consumption,
+                "dribs": pm.consumption_drib,
+                "straps": pm.consumption_straps,
+                "mribs": pm.consumption_mribs
+            }
+        finally:
+            self._cellplotmakers.pop(cell, None)
+
+        return parts, weights
+
+    def iter_layouts(self, executor: Executor | None=None) -> Iterator[tuple[str, Layout]]:
+        """
+        Unwrap cell by cell (one layout with the panels, dribs, straps, rigidfoils and miniribs of a cell),
+        then rib by rib and the extra parts. Yields the layouts together with the name of the stage
+        ("cells", "ribs", "extra_parts").
+        The parts and the cellplotmakers are not kept, only the material usage (weight) is set.
+        """
+        distance_x = self.config.patterns_align_dist_x
+        distance_y = self.config.patterns_align_dist_y
+
+        weights = {name: MaterialUsage() for name in ("panels", "dribs", "straps", "mribs")}
+        cell_parts = self._map("_get_cell_parts", list(range(len(self.glider_3d.cells))), executor)
+
+        for cell_no, (parts, cell_weights) in enumerate(cell_parts):
+            for name, cell_weight in cell_weights.items():
+                if name != "panels" or cell_no > 0 or not self.glider_3d.has_center_cell:
+                    cell_weight *= 2
+                weights[name] += cell_weight
+
+            columns: list[Layout | PlotPart] = [Layout.stack_column(stage_parts, distance_y) for stage_parts in parts.values() if stage_parts]
+            yield "cells", Layout.stack_row(columns, distance_x)
+
+        self.weight.update(weights)
+
+        self.extra_parts = []
+        for _rib, plotpart in self.iter_ribs(executor):
+            plotpart.rotate(-90, radians=False)
+            yield "ribs", Layout([plotpart])
+
+        for part in self.extra_parts:
+            yield "extra_parts", Layout([part])
+
     def get_all_grouped(self) -> Layout:
         # create x-raster
         for rib in self.ribs:
@@ -277,11 +471,15 @@ class PlotMaker:
 
         return Layout.stack_column(all_layouts, 0.1, center_x=False)
 
-    def unwrap(self) -> PlotMaker:
-        self.get_panels()
-        self.get_ribs()
-        self.get_dribs()
-        self.get_straps()
+    def unwrap(self, executor: Executor | None=None) -> PlotMaker:
+        """
+        Create all plotparts. Cells and ribs are unwrapped in parallel if an executor is given,
+        use a ProcessPoolExecutor to make use of multiple cores.
+        """
+        self.get_panels(executor=executor)
+        self.get_ribs(executor=executor)
+        self.get_dribs(executor=executor)
+        self.get_straps(executor=executor)
         self.get_rigidfoils()
-        self.get_miniribs()
+        self.get_miniribs(executor=executor)
         return self
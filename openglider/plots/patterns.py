@@ -1,9 +1,12 @@
+import contextlib
 import datetime
 import logging
 import euklid
 import string
 import subprocess
+import time
 from typing import Any
+from collections.abc import Iterator
 from pathlib import Path
 
 import openglider.glider
@@ -21,7 +24,8 @@ from openglider.plots.glider import PlotMaker
 from openglider.plots.spreadsheets import get_glider_data
 from openglider.plots.usage_stats import MaterialUsage
 from openglider.utils.config import Config
-from openglider.vector.drawing import Layout
+from openglider.utils.disk_cache import DiskCache
+from openglider.vector.drawing import DXFWriter, Layout, LayoutStream, SVGWriter
 from openglider.vector.text import Text
 
 #import openglider.plots.sketches
@@ -42,6 +46,7 @@ class PatternsNew:
         self.glider_2d = self.project.glider
         self.logger = logging.getLogger(f"{self.__class__.__module__}.{self.__class__.__name__}")
         self.weight: dict[str, MaterialUsage] = {}
+        self.timings: dict[str, float] = {}
 
     def __json__(self) -> dict[str, Any]:
         return {
@@ -89,26 +94,88 @@ class PatternsNew:
 
         return drawings
     
-    def _get_plotfile(self) -> Layout:
+    def _set_timing(self, name: str, start: float) -> None:
+        self.timings[name] = time.perf_counter() - start
+        self.logger.info(f"{name}: {self.timings[name]:.2f}s")
+
+    @contextlib.contextmanager
+    def _stage(self, name: str) -> Iterator[None]:
+        self.logger.info(f"create {name}")
+        start = time.perf_counter()
+        yield
+        self._set_timing(name, start)
+
+    @contextlib.contextmanager
+    def _disk_cache_session(self, glider: Glider) -> Iterator[None]:
+        disk_cache = DiskCache.get_default()
+        if disk_cache is None:
+            yield
+        else:
+            with disk_cache.session(disk_cache.get_key(glider, self.config)):
+                yield
+
+    def _get_plotmaker(self) -> PlotMaker:
         if self.config.complete_glider:
             glider = self.project.get_glider_3d().copy_complete()
             glider.rename_parts()
         else:
             glider = self.project.get_glider_3d()
         
-
         plots = self.plotmaker(glider, config=self.config)
         glider.lineset.iterate_target_length()
-            
-        plots.unwrap()
+
+        return plots
+
+    def _get_plotfile(self) -> Layout:
+        plots = self._get_plotmaker()
+
+        with self._disk_cache_session(plots.glider_3d):
+            plots.unwrap()
+
         self.weight = plots.weight
         all_patterns = plots.get_all_grouped()
 
         return all_patterns
 
-    def unwrap(self, outdir: Path | str) -> None:
+    def _write_plotfile_streaming(self, outdir: Path, designs: Layout) -> None:
+        """
+        Write the parts to plots_all.dxf / plots_all.svg as they get unwrapped, one row per stage.
+        There is no grouping by material as in _get_plotfile.
+        """
+        plots = self._get_plotmaker()
+        writers = [DXFWriter(outdir / "plots_all.dxf"), SVGWriter(outdir / "plots_all.svg")]
+
+        with LayoutStream(writers, self.config.patterns_align_dist_x, self.config.patterns_align_dist_y, scale=1000) as stream:
+            stream.add(designs)
+
+            with self._disk_cache_session(plots.glider_3d):
+                current_stage = None
+                start = time.perf_counter()
+
+                for stage, layout in plots.iter_layouts():
+                    if stage != current_stage:
+                        if current_stage is not None:
+                            self._set_timing(f"plots_{current_stage}", start)
+                        current_stage = stage
+                        start = time.perf_counter()
+                        stream.new_row()
+
+                    stream.add(layout)
+
+                if current_stage is not None:
+                    self._set_timing(f"plots_{current_stage}", start)
+
+        self.weight = plots.weight
+
+    def unwrap(self, outdir: Path | str, streaming: bool=False) -> None:
+        """
+        Create all the files for production in outdir.
+        With streaming=True the patterns are written to the plotfile as they get unwrapped
+        (less memory, no grouping by material), see _write_plotfile_streaming.
+        """
         if not isinstance(outdir, Path):
             outdir = Path(outdir)
+        self.timings = {}
         if self.config.profile_numpoints is not None:
             self.project.glider.num_profile = self.config.profile_numpoints
             self.project.glider_3d = self.project.glider.get_glider_3d()
@@ -116,32 +183,37 @@ class PatternsNew:
 
         subprocess.call(f"mkdir -p {outdir}", shell=True)
 
-        self.logger.info("create sketches")
-        drawings = self._get_sketches()
-        designs = Layout.stack_column(drawings, self.config.patterns_align_dist_y)
+        with self._stage("sketches"):
+            drawings = self._get_sketches()
+            designs = Layout.stack_column(drawings, self.config.patterns_align_dist_y)
 
-        self.logger.info("create plots")
-        all_patterns = self._get_plotfile()
-        all_patterns.append_left(designs, distance=self.config.patterns_align_dist_x*2)
+        with self._stage("plots"):
+            if streaming:
+                self._write_plotfile_streaming(outdir, designs)
+            else:
+                all_patterns = self._get_plotfile()
+                all_patterns.append_left(designs, distance=self.config.patterns_align_dist_x*2)
 
-        all_patterns.scale(1000)
-        all_patterns.export_dxf(outdir / "plots_all.dxf")
+                all_patterns.scale(1000)
+                all_patterns.export_dxf(outdir / "plots_all.dxf")
 
-        sketches = openglider.plots.sketches.get_all_plots(self.project)
+        with self._stage("sketches_pdf"):
+            sketches = openglider.plots.sketches.get_all_plots(self.project)
 
-        for sketch_name, sketch in sketches.items():
-            fill = False
-            if sketch_name in ("design_upper", "design_lower"):
-                fill=True
+            for sketch_name, sketch in sketches.items():
+                fill = False
+                if sketch_name in ("design_upper", "design_lower"):
+                    fill=True
 
-            sketch.export_a4(outdir / f"{sketch_name}.pdf", fill=fill)
+                sketch.export_a4(outdir / f"{sketch_name}.pdf", fill=fill)
 
-        self.logger.info("create spreadsheets")
-        self.project.get_glider_3d().lineset.rename_lines()
-        excel = get_glider_data(self.project, consumption=self.weight)
-        excel.saveas(outdir / f"{self.project.name}.ods")
+        with self._stage("spreadsheets"):
+            self.project.get_glider_3d().lineset.rename_lines()
+            excel = get_glider_data(self.project, consumption=self.weight)
+            excel.saveas(outdir / f"{self.project.name}.ods")
 
-        openglider.save(self.project, outdir / "project.json")
+        with self._stage("project"):
+            openglider.save(self.project, outdir / "project.json")
 
 
 class Patterns(PatternsNew):
@@ -0,0 +1,226 @@
+import gc
+import os
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+import openglider
+from openglider.utils.cache import HashedList, InstanceCache, LruCache, cached_function, cached_property, capture_stats, get_generation, get_stats, trim
+from openglider.utils.dataclass import BaseModel, dataclass
+from openglider.utils.disk_cache import DiskCache, get_session
+
+
+class Child(BaseModel):
+    value: float = 0.
+
+
+@dataclass
+class Parent:
+    child: Child
+    values: HashedList[float]
+    factor: float = 1.
+
+    @cached_property("child", "values", "factor")
+    def result(self) -> float:
+        return self.child.value * self.factor + sum(self.values)
+
+    @cached_function("self", per_instance=True, max_size=4)
+    def get_scaled(self, factor: float) -> float:
+        return self.result * factor
+
+
+class Named(BaseModel):
+    name: str
+    value: float = 0.
+
+    @cached_function("self", persistent=True)
+    def get_scaled(self, factor: float) -> list[float]:
+        return [self.value * factor]
+
+
+class TestGenerationCache(unittest.TestCase):
+    def setUp(self) -> None:
+        openglider.config.cache_generations = True
+        self.parent = Parent(Child(value=1.), HashedList([1., 2.]))
+
+    def tearDown(self) -> None:
+        openglider.config.cache_generations = False
+
+    def test_generation(self) -> None:
+        for obj in (self.parent, self.parent.child, self.parent.values):
+            generation = get_generation(obj)
+            self.assertIsNotNone(generation)
+            self.assertEqual(get_generation(obj), generation)
+
+        self.assertIsNone(get_generation(1.))
+
+    def test_invalidation(self) -> None:
+        self.assertEqual(self.parent.result, 4.)
+
+        self.parent.factor = 2.
+        self.assertEqual(self.parent.result, 5.)
+
+        self.parent.child.value = 2.
+        self.assertEqual(self.parent.result, 7.)
+
+        self.parent.values[0] = 2.
+        self.assertEqual(self.parent.result, 8.)
+
+        self.parent.child = Child(value=0.)
+        self.assertEqual(self.parent.result, 4.)
+
+    def test_parent_chain(self) -> None:
+        grandparent = Parent(Child(), HashedList([]))
+        grandparent.child = self.parent.child
+        generation = get_generation(grandparent)
+
+        # changes of a child give the owners a new generation
+        self.parent.child.value = 3.
+        self.assertNotEqual(get_generation(grandparent), generation)
+        self.assertEqual(self.parent.result, 6.)
+
+    def test_no_marker(self) -> None:
+        get_generation(self.parent)
+        self.parent.factor = 2.
+        self.assertNotIn("_cache_generation", vars(self.parent))
+
+    def test_disabled(self) -> None:
+        generation = get_generation(self.parent)
+        openglider.config.cache_generations = False
+        self.parent.factor = 3.
+        self.assertEqual(get_generation(self.parent), generation)
+
+
+class TestInstanceCache(unittest.TestCase):
+    def test_per_instance(self) -> None:
+        cache: InstanceCache = getattr(Parent.get_scaled, "cache")
+        parents = [Parent(Child(value=i), HashedList([])) for i in range(10)]
+
+        for parent in parents:
+            for factor in range(3):
+                self.assertEqual(parent.get_scaled(factor), parent.child.value * factor)
+
+        self.assertGreaterEqual(len(cache.caches), len(parents))
+
+        for parent in parents:
+            self.assertEqual(parent.get_scaled(2), parent.child.value * 2)
+            self.assertEqual(len(cache.get_cache(parent).cache), 3)
+
+        del parents, parent
+        gc.collect()
+        self.assertEqual(len(cache.caches), 0)
+
+
+class TestCacheStats(unittest.TestCase):
+    def test_capture_stats(self) -> None:
+        parent = Parent(Child(value=1.), HashedList([1., 2.]))
+
+        with capture_stats("test") as report:
+            for _ in range(3):
+                parent.get_scaled(2.)
+
+        stats = {stat.name: stat for stat in report.stats}
+        self.assertEqual(stats["Parent.get_scaled"].hits, 2)
+        self.assertEqual(stats["Parent.get_scaled"].misses, 1)
+        self.assertEqual(stats["Parent.result"].misses, 1)
+        self.assertGreater(stats["Parent.get_scaled"].memory, 0)
+        self.assertGreater(stats["Parent.get_scaled"].hash_time, 0)
+        self.assertIn("Parent.get_scaled", str(report))
+
+    def test_no_timing_outside_capture(self) -> None:
+        parent = Parent(Child(value=1.), HashedList([1., 2.]))
+        before = {stat.name: stat for stat in get_stats(estimate_memory=False)}["Parent.get_scaled"]
+
+        for _ in range(3):
+            parent.get_scaled(3.)
+
+        after = {stat.name: stat for stat in get_stats(estimate_memory=False)}["Parent.get_scaled"]
+        self.assertEqual(after.calls - before.calls, 3)
+        self.assertEqual(after.hash_time, before.hash_time)
+        self.assertEqual(after.miss_time, before.miss_time)
+
+
+class TestCacheSize(unittest.TestCase):
+    def test_max_bytes(self) -> None:
+        cache: LruCache[list[float]] = LruCache(100, max_bytes=10000)
+        for i in range(50):
+            cache.set(i, [float(i)] * 100)
+
+        self.assertLessEqual(cache.size, 10000)
+        self.assertGreater(cache.evictions, 0)
+        self.assertIsNotNone(cache.get(49))
+        self.assertIsNone(cache.get(0))
+
+    def test_trim(self) -> None:
+        parent = Parent(Child(value=1.), HashedList([1., 2.]))
+        for i in range(4):
+            parent.get_scaled(float(i))
+
+        trim()
+        self.assertEqual(len(getattr(Parent.get_scaled, "cache")), 0)
+        self.assertEqual(parent.get_scaled(2.), 2 * parent.result)
+
+
+class TestDiskCache(unittest.TestCase):
+    def test_session(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            disk_cache = DiskCache(Path(tmpdir))
+            objects = [Named(name=str(i), value=i) for i in range(3)]
+            key = disk_cache.get_key(objects)
+            self.assertEqual(key, DiskCache.get_key([Named(name=str(i), value=i) for i in range(3)]))
+
+            with disk_cache.session(key) as session:
+                results = [obj.get_scaled(2.) for obj in objects]
+            self.assertEqual(session.misses, 3)
+
+            trim()
+            with disk_cache.session(key) as session:
+                self.assertEqual([obj.get_scaled(2.) for obj in objects], results)
+            self.assertEqual(session.hits, 3)
+
+            # objects with the same name are not persisted
+            trim()
+            with disk_cache.session(disk_cache.get_key("other")) as session:
+                Named(name="a", value=1.).get_scaled(1.)
+                self.assertEqual(Named(name="a", value=2.).get_scaled(1.), [2.])
+
+            disk_cache.clear()
+            self.assertFalse(Path(tmpdir).exists())
+
+    def test_thread(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            disk_cache = DiskCache(Path(tmpdir))
+            sessions = []
+
+            with disk_cache.session(disk_cache.get_key("thread")) as session:
+                thread = threading.Thread(target=lambda: sessions.append(get_session()))
+                thread.start()
+                thread.join()
+                self.assertIs(get_session(), session)
+
+            self.assertEqual(sessions, [None])
+            self.assertIsNone(get_session())
+
+    def test_evict(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            disk_cache = DiskCache(Path(tmpdir))
+            keys = [disk_cache.get_key(i) for i in range(3)]
+
+            for i, key in enumerate(keys):
+                with disk_cache.session(key):
+                    Named(name="a", value=float(i)).get_scaled(1.)
+                os.utime(Path(tmpdir) / key, (i, i))
+                trim()
+
+            size = disk_cache.get_size(keys[0])
+            disk_cache.max_bytes = 2 * size
+            # the last used key is kept
+            with disk_cache.session(keys[0]):
+                pass
+
+            self.assertEqual(sorted(path.name for path in Path(tmpdir).iterdir()), sorted([keys[0], keys[2]]))
+
+
+if __name__ == '__main__':
+    unittest.main()
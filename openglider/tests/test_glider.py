@@ -1,6 +1,11 @@
+import math
 import random
 import unittest
 
+import numpy as np
+
+from openglider.glider.cell.basic_cell import BasicCell
+from openglider.glider.rib import MiniRib
 from openglider.tests.common import GliderTestCase
 
 
@@ -40,6 +45,102 @@ class TestGlider(GliderTestCase):
         y = random.random()*len(self.glider.cells)
         self.glider.get_midrib(y).flatten()
 
+    @staticmethod
+    def get_midrib_reference(basic_cell: BasicCell, y_value: float, arc_argument: bool=True, close_trailing_edge: bool=False) -> tuple[list[list[float]], list[float]]:
+        # per point midrib (as before get_midrib_data)
+        prof1 = basic_cell.prof1.curve.tolist()
+        prof2 = basic_cell.prof2.curve.tolist()
+        normvectors = basic_cell.normvectors.tolist()
+        node_len = len(prof1)
+
+        points = []
+        x_values = []
+        for i in range(node_len):
+            x_left = basic_cell.prof1.x_values[i]
+            x_right = basic_cell.prof2.x_values[i]
+            x_values.append(x_left + y_value * (x_right - x_left))
+            ballooning_radius = basic_cell.ballooning_radius[i]
+
+            if close_trailing_edge and i in (0, node_len-1):
+                d = y_value
+                h = 0.
+            elif ballooning_radius > 1e-10:
+                phi = basic_cell.ballooning_phi[i]
+                if arc_argument:
+                    psi = phi * 2 * y_value
+                    d = 0.5 - 0.5 * math.sin(phi - psi) / math.sin(phi)
+                    h = (math.cos(phi - psi) - math.cos(phi)) * ballooning_radius
+                else:
+                    d = y_value
+                    h = (math.cos(math.asin((2 * d - 1) * math.sin(phi))) -  math.cos(phi)) * ballooning_radius
+            else:
+                d = y_value
+                h = 0.
+
+            points.append([p1 + (p2 - p1) * d + n * h for p1, p2, n in zip(prof1[i], prof2[i], normvectors[i])])
+
+        return points, x_values
+
+    def test_midrib_data(self) -> None:
+        y_values = [0., 0.2, 0.5, 0.8, 1.]
+
+        for cell in self.glider.cells:
+            basic_cell = cell.basic_cell
+            numpoints = len(basic_cell.prof1.curve)
+
+            for kwargs in ({}, {"arc_argument": False}, {"close_trailing_edge": True}):
+                points, x_values = basic_cell.get_midrib_data(y_values, **kwargs)
+                self.assertEqual(points.shape, (len(y_values), numpoints, 3))
+                self.assertEqual(x_values.shape, (len(y_values), numpoints))
+
+                for y_value, rib, rib_x_values in zip(y_values[1:-1], points[1:-1], x_values[1:-1]):
+                    reference, reference_x_values = self.get_midrib_reference(basic_cell, y_value, **kwargs)
+                    self.assertLess(np.abs(rib - reference).max(), 1e-10)
+                    self.assertLess(np.abs(rib_x_values - reference_x_values).max(), 1e-10)
+
+                    midrib = basic_cell.midrib(y_value, **kwargs)
+                    self.assertLess(np.abs(np.array(midrib.curve.tolist()) - reference).max(), 1e-10)
+
+                for i, (p1, p2) in enumerate(zip(basic_cell.prof1.curve.tolist(), basic_cell.prof2.curve.tolist())):
+                    for j in range(3):
+                        self.assertAlmostEqual(points[0, i, j], p1[j])
+                        self.assertAlmostEqual(points[-1, i, j], p2[j])
+
+            # the interior points are ballooned
+            flat = basic_cell.midrib(0.5, ballooning=False)
+            self.assertGreater(np.abs(points[2] - np.array(flat.curve.tolist())).max(), 1e-3)
+
+            for p1, p2, p_mid in zip(basic_cell.prof1.curve.tolist(), basic_cell.prof2.curve.tolist(), flat.curve.tolist()):
+                for j in range(3):
+                    self.assertAlmostEqual(p_mid[j], (p1[j] + p2[j]) / 2)
+
+    def test_midrib_grid(self) -> None:
+        y_values = (0., 0.2, 0.5, 0.8, 1.)
+        cell = self.glider.cells[1]
+        cell.miniribs = [MiniRib(yvalue=0.5, front_cut=0.2)]
+
+        for cell in self.glider.cells[:2]:
+            grid = cell.get_midrib_grid(y_values)
+            self.assertEqual(grid.shape, (len(y_values), len(cell.x_values), 3))
+
+            for y, rib in zip(y_values, grid):
+                for p1, p2 in zip(cell.midrib(y).curve.tolist(), rib.tolist()):
+                    for j in range(3):
+                        self.assertAlmostEqual(p1[j], p2[j])
+
+            # the grid is cached, modifying it would change later results
+            with self.assertRaises(ValueError):
+                grid[0, 0, 0] = 1.
+
+    def test_flattened_cell(self) -> None:
+        cell = self.glider.cells[1]
+        flattened = cell.get_flattened_cell(20)
+        left, right = flattened.ballooned
+
+        # the flattened sides keep the length of the ribs
+        self.assertAlmostEqual(left.get_length(), cell.rib1.profile_3d.curve.get_length(), places=5)
+        self.assertAlmostEqual(right.get_length(), cell.rib2.profile_3d.curve.get_length(), places=5)
+
     def copy_complete(self) -> None:
         self.glider.copy_complete()
 
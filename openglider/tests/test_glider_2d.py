@@ -1,9 +1,17 @@
 import unittest
+import unittest.mock
+from typing import Any
 
+import euklid
+import numpy as np
 import tempfile
 from openglider.tests.common import GliderTestCase
+import openglider
 from openglider import jsonify
 from openglider.glider import ParametricGlider
+from openglider.glider.ballooning.new import BallooningBezierNeu
+from openglider.glider.parametric.table.attachment_points import CellAttachmentPointTable
+from openglider.utils.table import Table
 
 TEMPDIR =  tempfile.gettempdir()
 
@@ -15,11 +23,90 @@ class GliderTestCase2D(GliderTestCase):
         glider = self.parametric_glider.get_glider_3d()
         self.assertAlmostEqual(glider.span, 2*self.parametric_glider.shape.span, 2)
 
+    def test_create_glider_incremental(self) -> None:
+        glider = self.parametric_glider.get_glider_3d()
+        cells = glider.cells[:]
+
+        self.assertIs(self.parametric_glider.get_glider_3d(glider), glider)
+        self.assertTrue(all(cell is old_cell for cell, old_cell in zip(glider.cells, cells)))
+
+        aoa = self.parametric_glider.aoa
+        aoa.controlpoints = euklid.vector.PolyLine2D([[x, y*1.1] for x, y in aoa.controlpoints])
+        self.parametric_glider.get_glider_3d(glider)
+        self.assertIsNot(glider.cells[0], cells[0])
+        self.assertIs(glider.cells[0].panels, cells[0].panels)
+        self.assertEqual(jsonify.digest(glider), jsonify.digest(self.parametric_glider.get_glider_3d()))
+
+    def test_create_glider_incremental_stabicell(self) -> None:
+        self.parametric_glider.config.has_stabicell = True
+        cell_no = self.parametric_glider.shape.half_cell_num - 1
+        table = Table()
+        table[0, 0] = "ATP"
+        for column, value in enumerate(["X1", 0.5, 0.3, 1.]):
+            table[cell_no+2, column] = value
+        self.parametric_glider.tables.attachment_points_cell = CellAttachmentPointTable(table)
+
+        glider = self.parametric_glider.get_glider_3d()
+        ribs = glider.ribs[:]
+        cells = glider.cells[:]
+
+        self.assertIsInstance(glider.cells[-1].ballooning, BallooningBezierNeu)
+        self.assertAlmostEqual(glider.ribs[-1].profile_2d.thickness, 0)
+        self.assertEqual(len(glider.cells[-1].attachment_points), 1)
+
+        # new cells on the reused (scaled) ribs
+        curve = self.parametric_glider.ballooning_merge_curve
+        curve.controlpoints = euklid.vector.PolyLine2D([[x, y+0.1] for x, y in curve.controlpoints])
+        self.parametric_glider.get_glider_3d(glider)
+        self.assertIs(glider.ribs[-1], ribs[-1])
+        self.assertIsNot(glider.cells[-1], cells[-1])
+        self.assertEqual(jsonify.digest(glider), jsonify.digest(self.parametric_glider.get_glider_3d()))
+
+    def test_input_digests_generations(self) -> None:
+        known: dict[str, tuple[Any, int, str]] = {}
+        openglider.config.cache_generations = True
+        try:
+            digests = self.parametric_glider.get_input_digests(known=known)
+            self.assertIn("shape", known)
+
+            with unittest.mock.patch.object(openglider.jsonify, "digest", wraps=openglider.jsonify.digest) as digest:
+                self.assertEqual(self.parametric_glider.get_input_digests(known=known), digests)
+            self.assertNotIn(unittest.mock.call(self.parametric_glider.shape), digest.call_args_list)
+
+            self.parametric_glider.config.has_stabicell = True
+            changed = self.parametric_glider.get_input_digests(known=known)
+        finally:
+            openglider.config.cache_generations = False
+
+        self.assertNotEqual(changed["cells"], digests["cells"])
+        self.assertEqual(changed, self.parametric_glider.get_input_digests())
+
+    def test_merge_profiles(self) -> None:
+        glider = self.parametric_glider
+        x_values = glider.profiles[0].x_values
+        factors = [i * (len(glider.profiles)-1) / 6 for i in range(7)]
+
+        merged = glider.get_merge_profile_data(factors, glider.get_profile_data(x_values))
+
+        for factor, profile_data in zip(factors, merged):
+            profile = glider.get_merge_profile(factor).set_x_values(x_values)
+            self.assertLess(np.abs(np.array(profile.curve.tolist()) - profile_data).max(), 1e-10)
+
     def test_export(self) -> None:
         exp = jsonify.dumps(self.parametric_glider)
         imp = jsonify.loads(exp)['data']
         self.assertEqualGlider2D(self.parametric_glider, imp)
 
+    def test_digest(self) -> None:
+        digest = jsonify.digest(self.parametric_glider)
+        copy = jsonify.loads(jsonify.dumps(self.parametric_glider))['data']
+        self.assertEqual(jsonify.digest(copy), digest)
+        self.assertEqual(jsonify.digest(copy.tables), jsonify.digest(self.parametric_glider.tables))
+
+        copy.shape.set_area(10)
+        self.assertNotEqual(jsonify.digest(copy), digest)
+        self.assertNotEqual(jsonify.digest(copy.shape.front_curve), jsonify.digest(self.parametric_glider.shape.front_curve))
+
         #def test_export_ods(self) -> None:
 
     def test_set_area(self) -> None:
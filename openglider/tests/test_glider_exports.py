@@ -1,7 +1,10 @@
 import tempfile
 
+import ezdxf
+
 from openglider.tests.common import GliderTestCase, os, unittest
 from openglider.plots import PlotMaker
+from openglider.vector.drawing import DXFWriter, LayoutStream, SVGWriter
 from openglider import jsonify
 
 
@@ -35,6 +38,30 @@ class TestGlider(GliderTestCase):
         all_patterns.export_dxf(dxfile)
         all_patterns.export_ntv(ntvfile)
 
+    def test_export_plots_streaming(self) -> None:
+        dxfile = self.tempfile("kite_plots_stream.dxf")
+        svgfile = self.tempfile("kite_plots_stream.svg")
+
+        patterns = PlotMaker(self.glider)
+        writers = [DXFWriter(dxfile), SVGWriter(svgfile)]
+        stages = []
+        with LayoutStream(writers, 0.2, 0.1, scale=1000) as stream:
+            for stage, layout in patterns.iter_layouts():
+                if stage not in stages:
+                    stages.append(stage)
+                    stream.new_row()
+                stream.add(layout)
+                # the cellplotmakers are dropped cell by cell
+                self.assertEqual(len(patterns._cellplotmakers), 0)
+
+        self.assertEqual(stages[:2], ["cells", "ribs"])
+        self.assertGreater(len(ezdxf.readfile(dxfile).modelspace()), 0)
+
+        reference = PlotMaker(self.glider)
+        reference.unwrap()
+        for name in ("panels", "ribs", "dribs", "straps", "mribs"):
+            self.assertAlmostEqual(patterns.weight[name].total(), reference.weight[name].total())
+
     def test_export_glider_json(self) -> None:
         with open(self.tempfile('kite_3d.json'), "w+") as tmp:
             jsonify.dump(self.glider, tmp)
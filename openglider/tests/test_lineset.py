@@ -0,0 +1,240 @@
+import concurrent.futures
+import unittest
+import unittest.mock
+
+from openglider.lines.knots import KnotCorrections
+from openglider.lines.line_types import LineType
+from openglider.lines.lineset import LineSet, LineSetVariant
+from openglider.tests.common import GliderTestCase
+from openglider.vector.unit import Length
+
+
+class TestLineSet(GliderTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.lineset = self.glider.lineset
+
+    def get_sag_parameters(self) -> list[tuple[float | None, float | None]]:
+        return [(line.sag_par_1, line.sag_par_2) for line in self.lineset.lines]
+
+    def assertSagEqual(self, sag_1: list[tuple[float | None, float | None]], sag_2: list[tuple[float | None, float | None]]) -> None:
+        for (par_1_1, par_1_2), (par_2_1, par_2_2) in zip(sag_1, sag_2):
+            assert par_1_1 is not None and par_2_1 is not None
+            assert par_1_2 is not None and par_2_2 is not None
+            self.assertAlmostEqual(par_1_1, par_2_1, places=8)
+            self.assertAlmostEqual(par_1_2, par_2_2, places=8)
+
+    def test_sparse_sag(self) -> None:
+        self.lineset.vectorized = False
+        self.lineset.sparse_sag = False
+        self.lineset.recalc()
+        dense = self.get_sag_parameters()
+
+        self.lineset.sparse_sag = True
+        self.lineset.recalc()
+        self.assertSagEqual(dense, self.get_sag_parameters())
+
+    def test_vectorized_recalc(self) -> None:
+        self.lineset.vectorized = False
+        self.lineset.recalc()
+        reference = [(line.force, list(line.upper_node.position)) for line in self.lineset.lines]
+        sag_reference = self.get_sag_parameters()
+
+        self.lineset.vectorized = True
+        self.lineset.recalc()
+        self.assertSagEqual(sag_reference, self.get_sag_parameters())
+
+        for line, (force, position) in zip(self.lineset.lines, reference):
+            assert line.force is not None and force is not None
+            self.assertAlmostEqual(line.force, force, places=6)
+            for x1, x2 in zip(line.upper_node.position, position):
+                self.assertAlmostEqual(x1, x2, places=8)
+
+    def test_recalc_tolerance(self) -> None:
+        self.lineset.recalc(iterations=50, tolerance=0.01)
+        report = self.lineset.convergence
+
+        assert report is not None
+        self.assertTrue(report.converged)
+        self.assertLess(report.iterations, 50)
+        self.assertLess(report.residual, 0.01)
+        self.assertEqual(len(report.residuals), report.iterations)
+
+    def test_iterate_target_length(self) -> None:
+        report = self.lineset.iterate_target_length(steps=20, tolerance=1e-4)
+
+        self.assertTrue(report.converged)
+        self.assertLess(report.length_errors[-1], 1e-4)
+
+    def test_recalc_dirty(self) -> None:
+        self.lineset.recalc()
+        line = [line for line in self.lineset.lines if line.upper_node.node_type == line.upper_node.NODE_TYPE.KNOT][-1]
+        assert line.init_length is not None
+        line.init_length += 0.05
+
+        lowest_lines = self.lineset.get_lowest_lines(line)
+        self.assertEqual(len(lowest_lines), 1)
+        other_lines = [other for other in self.lineset.lowest_lines if other is not lowest_lines[0]]
+        other_forces = [other.force for other in other_lines]
+
+        self.lineset.mark_dirty(line)
+        self.lineset.recalc_dirty()
+        result = [(l.force, list(l.upper_node.position)) for l in self.lineset.lines]
+
+        for other, force in zip(other_lines, other_forces):
+            self.assertEqual(other.force, force)
+
+        self.lineset.recalc()
+        for l, (force, position) in zip(self.lineset.lines, result):
+            assert l.force is not None and force is not None
+            self.assertAlmostEqual(l.force, force)
+            for x1, x2 in zip(l.upper_node.position, position):
+                self.assertAlmostEqual(x1, x2)
+
+    def test_recalc_dirty_not_converged(self) -> None:
+        self.lineset.recalc()
+        self.lineset.mark_dirty(self.lineset.lowest_lines[0])
+
+        with self.assertLogs("openglider.lines.lineset", level="WARNING"):
+            self.lineset.recalc_dirty(iterations=1, tolerance=1e-12)
+
+        assert self.lineset.convergence is not None
+        self.assertFalse(self.lineset.convergence.converged)
+
+    def test_independent_groups(self) -> None:
+        groups = self.lineset.get_independent_groups()
+        self.assertGreater(len(groups), 1)
+        self.assertEqual(sum(len(group) for group in groups), len(self.lineset.lowest_lines))
+
+        self.lineset.recalc()
+        result = [(l.force, list(l.upper_node.position)) for l in self.lineset.lines]
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+            self.lineset.recalc(executor=executor)
+
+        for l, (force, position) in zip(self.lineset.lines, result):
+            assert l.force is not None and force is not None
+            self.assertAlmostEqual(l.force, force)
+            for x1, x2 in zip(l.upper_node.position, position):
+                self.assertAlmostEqual(x1, x2)
+
+    def test_checklengths(self) -> None:
+        self.lineset.calculate_sag = True
+        checklengths = self.lineset.get_checklengths()
+
+        for node in self.lineset.attachment_points:
+            self.assertAlmostEqual(checklengths[node.name], self.lineset.get_checklength(node))
+
+        line = self.lineset.uppermost_lines[0]
+        line.trim_correction = Length(0.1)
+        self.lineset.mark_dirty(line)
+        self.assertAlmostEqual(self.lineset.get_checklengths()[line.upper_node.name], checklengths[line.upper_node.name] + 0.1)
+
+        # changes without mark_dirty are picked up as well
+        line.trim_correction = Length(0.2)
+        self.assertAlmostEqual(self.lineset.get_checklengths()[line.upper_node.name], checklengths[line.upper_node.name] + 0.2)
+        self.assertAlmostEqual(self.lineset.get_line_length(line).manual_correction, 0.2)
+
+    def test_exporters_share_lengths(self) -> None:
+        with unittest.mock.patch.object(LineSet, "_get_line_length", autospec=True, side_effect=LineSet._get_line_length) as get_line_length:
+            self.lineset.get_table()
+            tree = self.lineset.create_tree()
+            calls = get_line_length.call_count
+
+            self.lineset.get_checksheet()
+            self.lineset.get_table_2()
+            self.assertIs(self.lineset.create_tree(), tree)
+            self.assertEqual(get_line_length.call_count, calls)
+
+            # a modified line resets the caches
+            self.lineset.lines[0].trim_correction = Length(0.1)
+            self.assertIsNot(self.lineset.create_tree(), tree)
+
+    def test_knot_positions(self) -> None:
+        for line in self.lineset.lines:
+            upper_lines = self.lineset.sort_lines(self.lineset.get_upper_connected_lines(line.lower_node), by_names=True)
+            line_no, total_lines = self.lineset.get_knot_position(line)
+            self.assertEqual(total_lines, len(upper_lines))
+            self.assertIs(upper_lines[line_no], line)
+
+    def test_lazy_registries(self) -> None:
+        line_type = LineType.get("liros.ltc65")
+        self.assertEqual(line_type.name, "liros.ltc65")
+        self.assertIn(line_type, LineType.get("cousin.vectraline12100").get_similar_lines())
+
+        self.assertIs(self.lineset.knot_corrections, KnotCorrections.get_default())
+        self.lineset.knot_corrections = KnotCorrections([])
+        self.assertIsNot(self.lineset.knot_corrections, KnotCorrections.get_default())
+
+    def test_line_points(self) -> None:
+        self.lineset.recalc()
+        line_points = self.lineset.get_line_points(numpoints=5)
+        self.assertEqual(line_points.shape, (len(self.lineset.lines), 5, 3))
+
+        for line, points in zip(self.lineset.lines, line_points):
+            sag = line.sag_par_1 is not None
+            for i, point in enumerate(points):
+                for x1, x2 in zip(point, list(line.get_line_point(i / 4, sag=sag))):
+                    self.assertAlmostEqual(x1, x2)
+
+        mesh = self.lineset.get_mesh(line_segment_length=0.1)
+        self.assertEqual(
+            sum(len(polygons) for polygons in mesh.polygons.values()),
+            sum(line.get_numpoints(segment_length=0.1) - 1 for line in self.lineset.lines)
+            )
+
+    def test_variants(self) -> None:
+        line = [line for line in self.lineset.lines if line.init_length is not None][-1]
+        variants = [
+            LineSetVariant(name="base"),
+            LineSetVariant(name="trim", length_deltas={line.name: 0.05}, v_inf=self.lineset.v_inf * 1.2)
+            ]
+        results = self.lineset.evaluate_variants(variants)
+
+        for variant_result in results:
+            if variant_result.variant.name == "trim":
+                assert line.init_length is not None
+                line.init_length += 0.05
+                self.lineset.v_inf = self.lineset.v_inf * 1.2
+
+            self.lineset.recalc()
+            checklengths = self.lineset.get_checklengths()
+
+            self.assertEqual(list(checklengths), list(variant_result.checklengths))
+            for name, length in checklengths.items():
+                self.assertAlmostEqual(length, variant_result.checklengths[name])
+            for l in self.lineset.lines:
+                assert l.force is not None
+                self.assertAlmostEqual(l.force, variant_result.forces[l.name])
+
+    def test_node_index(self) -> None:
+        for node in self.lineset.nodes:
+            upper = [line for line in self.lineset.lines if line.lower_node is node]
+            lower = [line for line in self.lineset.lines if line.upper_node is node]
+            self.assertEqual(self.lineset.get_upper_connected_lines(node), upper)
+            self.assertEqual(self.lineset.get_lower_connected_lines(node), lower)
+
+    def test_node_index_modified(self) -> None:
+        line = self.lineset.lines[-1]
+        self.lineset.get_upper_connected_lines(line.lower_node)
+
+        self.lineset.lines.remove(line)
+        self.assertNotIn(line, self.lineset.get_upper_connected_lines(line.lower_node))
+
+        self.lineset.lines.append(line)
+        self.assertIn(line, self.lineset.get_upper_connected_lines(line.lower_node))
+
+        other = self.lineset.lines[0]
+        line.lower_node = other.lower_node
+        self.assertIn(line, self.lineset.get_upper_connected_lines(other.lower_node))
+
+    def test_node_index_copy_complete(self) -> None:
+        lineset = self.glider.copy_complete().lineset
+        self.assertEqual(len(lineset.lowest_lines), 2*len(self.lineset.lowest_lines))
+
+        for line in lineset.lines:
+            self.assertIn(line, lineset.get_upper_connected_lines(line.lower_node))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -2,10 +2,13 @@ import unittest
 
 import tempfile
 import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
 import openglider
 import openglider.plots
 import openglider.plots.glider
 from openglider.vector.drawing import Layout
+from openglider.vector.drawing.part import PlotPart
 from openglider.tests.common import GliderTestCase
 
 
@@ -33,5 +36,45 @@ class TestPlots(GliderTestCase):
         dwg = Layout.stack_row(self.plotmaker.ribs, 0.1)
         dwg.export_dxf(os.path.join(TEMPDIR, "test_ribs.dxf"))
 
+    def test_pickle_glider(self) -> None:
+        glider = pickle.loads(pickle.dumps(self.glider))
+        self.assertEqual(len(glider.cells), len(self.glider.cells))
+        self.assertAlmostEqual(glider.ribs[1].profile_3d.curve.get_length(), self.glider.ribs[1].profile_3d.curve.get_length())
+
+    def test_patterns_executor(self) -> None:
+        def get_nodes(parts: list[PlotPart]) -> list[list[list[float]]]:
+            return [line.tolist() for part in parts for layer in part.layers.values() for line in layer]
+
+        self.plotmaker.get_panels()
+        self.plotmaker.get_ribs()
+        self.plotmaker.get_dribs()
+        self.plotmaker.get_straps()
+
+        plotmaker = openglider.plots.PlotMaker(self.glider)
+        plotmaker_2 = openglider.plots.PlotMaker(self.glider)
+
+        # workers initialized once per plotmaker / pickled plotmaker per chunk
+        with plotmaker.get_executor(2) as executor, ProcessPoolExecutor(2) as executor_2:
+            for pm, ex in ((plotmaker, executor), (plotmaker_2, executor_2)):
+                pm.get_panels(executor=ex)
+                pm.get_ribs(executor=ex)
+                pm.get_dribs(executor=ex)
+                pm.get_straps(executor=ex)
+
+        for pm in (plotmaker, plotmaker_2):
+            self.assertEqual(get_nodes(pm.panels.parts), get_nodes(self.plotmaker.panels.parts))
+            self.assertEqual(get_nodes(pm.ribs), get_nodes(self.plotmaker.ribs))
+            self.assertEqual(
+                [get_nodes(parts) for parts in pm.dribs.values()],
+                [get_nodes(parts) for parts in self.plotmaker.dribs.values()]
+            )
+            self.assertEqual(
+                [get_nodes(upper + lower) for upper, lower in pm.straps.values()],
+                [get_nodes(upper + lower) for upper, lower in self.plotmaker.straps.values()]
+            )
+
+            for name in ("panels", "ribs", "dribs", "straps"):
+                self.assertAlmostEqual(self.plotmaker.weight[name].total(), pm.weight[name].total())
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -1,24 +1,246 @@
 from __future__ import annotations
 import collections
 
+import contextlib
 import copy
+import dataclasses
 import functools
+import itertools
 import logging
+import sys
+import time
+import weakref
 from typing import Generic, TypeVar, Any
 from collections.abc import Callable, Iterator, Sequence
 
 from typing import TYPE_CHECKING
 
 import openglider
+from openglider.utils import disk_cache
 
 
 logger = logging.getLogger(__name__)
 
 cache_instances: list[CachedProperty] = []
 
+_generation_counter = itertools.count(1)
+# number of active capture_stats blocks, the hash/miss times are only measured while > 0
+_timing_depth = 0
+_tracked_types: dict[type, bool] = {}
+
+
+def next_generation() -> int:
+    return next(_generation_counter)
+
+
+def is_tracked(obj_type: type) -> bool:
+    try:
+        return _tracked_types[obj_type]
+    except KeyError:
+        tracked = _tracked_types[obj_type] = getattr(obj_type, "_cache_tracked", False)
+        return tracked
+
+
+class _GenerationState:
+    """
+    Mutation counter of a tracked object and the tracked objects owning it
+    (which get a new generation as well when the object is modified)
+    """
+    __slots__ = ("generation", "parents", "linked", "ref")
+
+    def __init__(self, obj: Any):
+        self.generation = next(_generation_counter)
+        self.parents: list[weakref.ref[Any]] = []
+        # the tracked objects reachable from this object have it registered as parent
+        self.linked = False
+
+        key = id(obj)
+        def remove(_ref: weakref.ref[Any]) -> None:
+            if _generation_states.get(key) is self:
+                del _generation_states[key]
+
+        self.ref = weakref.ref(obj, remove)
+
+    def add_parent(self, parent: Any) -> None:
+        for ref in self.parents:
+            if ref() is parent:
+                return
+        self.parents.append(weakref.ref(parent))
+
+
+# kept outside of the objects so it doesn't show up in vars() or copies
+_generation_states: dict[int, _GenerationState] = {}
+
+
+def _get_generation_state(obj: Any) -> _GenerationState:
+    state = _generation_states.get(id(obj))
+    if state is None:
+        state = _generation_states[id(obj)] = _GenerationState(obj)
+
+    return state
+
+
+def _iter_children(value: Any) -> Iterator[Any]:
+    # tracked objects directly reachable from value (through lists, tuples and dicts)
+    stack = [value]
+    while stack:
+        value = stack.pop()
+        value_type = type(value)
+
+        if value_type is list or value_type is tuple:
+            stack.extend(value)
+        elif value_type is dict:
+            stack.extend(value.values())
+        elif is_tracked(value_type):
+            yield value
+
+
+def _link(obj: Any, values: Iterator[Any] | None=None) -> None:
+    """
+    Register obj as parent of all tracked objects reachable from it (or from the given values)
+    """
+    if values is None:
+        # the content of a HashedList is tracked by the list itself
+        if type(obj) is HashedList:
+            _get_generation_state(obj).linked = True
+            return
+        values = iter(obj.__dict__.values())
+
+    stack: list[tuple[Any, Iterator[Any]]] = [(obj, values)]
+    while stack:
+        parent, parent_values = stack.pop()
+        _get_generation_state(parent).linked = True
+
+        for value in parent_values:
+            for child in _iter_children(value):
+                child_state = _get_generation_state(child)
+                child_state.add_parent(parent)
+
+                if not child_state.linked and type(child) is not HashedList:
+                    stack.append((child, iter(child.__dict__.values())))
+                child_state.linked = True
+
+
+def get_generation(obj: Any) -> int | None:
+    """
+    Get the mutation counter of an object, None if the object is not tracked
+    (only BaseModel, dataclass and HashedList instances are).
+    The counter changes when the object or any tracked object reachable from it is modified.
+    """
+    if not is_tracked(type(obj)):
+        return None
+
+    state = _get_generation_state(obj)
+    if not state.linked:
+        _link(obj)
+
+    return state.generation
+
+
+def bump_generation(obj: Any, value: Any=None) -> None:
+    """
+    Mark an object as modified (and all objects owning it). This is done by __setattr__ of BaseModel/dataclass instances
+    (with the newly set value), in-place changes (p.e. list.append) need to call this manually.
+    Does nothing unless config.cache_generations is enabled.
+    """
+    if not openglider.config.cache_generations:
+        return
+
+    state = _generation_states.get(id(obj))
+    # no cache key was created for the object or its owners yet
+    if state is None:
+        return
+
+    if value is not None and state.linked:
+        _link(obj, iter([value]))
+
+    visited: set[int] = set()
+    states = [state]
+    while states:
+        state = states.pop()
+        if id(state) in visited:
+            continue
+        visited.add(id(state))
+
+        state.generation = next(_generation_counter)
+
+        parents = [ref() for ref in state.parents]
+        state.parents = [ref for ref, parent in zip(state.parents, parents) if parent is not None]
+        for parent in parents:
+            if parent is not None:
+                states.append(_get_generation_state(parent))
+
+
+def _generation_key_attributes(class_instance: Any, hashlist: Sequence[str], exclude: list[str] | None=None, generator: Callable[[Any], Sequence[Any]] | None=None) -> int:
+    """
+    Replacement for hash_attributes using mutation counters (config.cache_generations).
+    Attributes of the instance are covered by the generation of the instance,
+    tracked objects returned by properties or the generator are added.
+    """
+    key: list[int | None] = [id(class_instance), get_generation(class_instance)]
+
+    if not (len(hashlist) == 1 and hashlist[0] in ("self", "*") and exclude is not None):
+        for attribute in hashlist:
+            if attribute == "self":
+                continue
+
+            obj = class_instance
+            for name in attribute.split("."):
+                # attributes of tracked objects are covered by their generation
+                if is_tracked(type(obj)) and name in obj.__dict__:
+                    break
+
+                obj = getattr(obj, name)
+                if is_tracked(type(obj)):
+                    key += (id(obj), get_generation(obj))
+
+    if generator is not None:
+        for value in generator(class_instance):
+            if is_tracked(type(value)):
+                key += (id(value), get_generation(value))
+
+    return hash(tuple(key))
+
+
+class _CacheSize:
+    # estimated size of all cached values with size tracking [bytes]
+    total = 0
+
+_cache_size = _CacheSize()
+
+
 def clear() -> None:
     for instance in cache_instances:
-        instance.cache.cache.clear()
+        instance.cache.clear()
+
+
+def trim(max_bytes: int=0) -> int:
+    """
+    Evict the least recently used entries of the biggest caches until all caches together
+    use less than max_bytes (estimated). This is done automatically if config.cache_max_bytes is set.
+
+    :return: freed memory [bytes]
+    """
+    caches = [cache for instance in cache_instances for cache in instance.cache.get_lru_caches()]
+    for cache in caches:
+        cache.update_sizes()
+
+    total = sum(cache.size for cache in caches)
+    freed = 0
+
+    while total > max_bytes:
+        biggest = max(caches, key=lambda cache: cache.size)
+        if not len(biggest):
+            break
+
+        size = biggest.evict()
+        total -= size
+        freed += size
+
+    _cache_size.total = total
+    logger.debug(f"trimmed caches by {freed/1024:.0f}kB to {total/1024:.0f}kB")
+
+    return freed
 
 def stats() -> list[tuple[str, int, int]]:
     return [
@@ -26,6 +248,149 @@ def stats() -> list[tuple[str, int, int]]:
     ]
 
 
+@dataclasses.dataclass
+class CacheStats:
+    name: str
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    # time spent for computing the cache keys / the values on a miss (including nested caches) [s],
+    # only measured inside capture_stats
+    hash_time: float = 0.
+    miss_time: float = 0.
+    entries: int = 0
+    # estimated size of the cached values [bytes]
+    memory: int = 0
+
+    def __sub__(self, other: CacheStats) -> CacheStats:
+        # counters are relative, entries and memory stay absolute
+        return dataclasses.replace(
+            self,
+            hits=self.hits - other.hits,
+            misses=self.misses - other.misses,
+            evictions=self.evictions - other.evictions,
+            hash_time=self.hash_time - other.hash_time,
+            miss_time=self.miss_time - other.miss_time
+        )
+
+    @property
+    def calls(self) -> int:
+        return self.hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        if not self.calls:
+            return 0.
+        return self.hits / self.calls
+
+
+@dataclasses.dataclass
+class CacheReport:
+    name: str = ""
+    time: float = 0.
+    stats: list[CacheStats] = dataclasses.field(default_factory=list)
+
+    def __str__(self) -> str:
+        lines = [
+            f"cache report {self.name}: {self.time:.3f}s",
+            f"{'name':60s} {'hits':>8s} {'misses':>8s} {'evicted':>8s} {'hash[s]':>8s} {'miss[s]':>8s} {'entries':>8s} {'memory[kB]':>10s}"
+            ]
+
+        for stat in sorted(self.stats, key=lambda stat: stat.hash_time + stat.miss_time, reverse=True):
+            lines.append(
+                f"{stat.name:60s} {stat.hits:8d} {stat.misses:8d} {stat.evictions:8d} {stat.hash_time:8.3f} {stat.miss_time:8.3f} {stat.entries:8d} {stat.memory/1024:10.1f}"
+            )
+
+        return "\n".join(lines)
+
+
+def estimate_size(value: Any, seen: set[int] | None=None) -> int:
+    """
+    Rough estimate of the memory used by an object and its content [bytes]
+    """
+    if seen is None:
+        seen = set()
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+
+    size = sys.getsizeof(value)
+
+    nbytes = getattr(value, "nbytes", None)  # numpy
+    if isinstance(nbytes, int):
+        return size + nbytes
+
+    if isinstance(value, (str, bytes, int, float, bool, type(None))):
+        return size
+    elif isinstance(value, dict):
+        return size + sum(estimate_size(v, seen) for v in value.values())
+    elif isinstance(value, (list, tuple, set)):
+        return size + sum(estimate_size(v, seen) for v in value)
+
+    # euklid polylines
+    nodes = getattr(value, "nodes", None)
+    if isinstance(nodes, list):
+        size += sum(estimate_size(node, seen) for node in nodes)
+
+    instance_dict = getattr(value, "__dict__", None)
+    if instance_dict is not None:
+        size += estimate_size(instance_dict, seen)
+
+    return size
+
+
+def get_stats(estimate_memory: bool=True) -> list[CacheStats]:
+    """
+    Get the statistics of all caches (cached properties / cached functions)
+    """
+    result = []
+    for instance in cache_instances:
+        cache = instance.cache
+        stat = CacheStats(
+            instance.__qualname__,
+            hits=cache.hits,
+            misses=cache.misses,
+            evictions=cache.evictions,
+            hash_time=cache.hash_time,
+            miss_time=cache.miss_time,
+            entries=len(cache)
+            )
+        if estimate_memory:
+            stat.memory = sum(estimate_size(value) for value in cache.values())
+
+        result.append(stat)
+
+    return result
+
+
+@contextlib.contextmanager
+def capture_stats(name: str="", estimate_memory: bool=True) -> Iterator[CacheReport]:
+    """
+    Capture the cache statistics of an operation:
+
+    with capture_stats("glider_3d") as report:
+        glider_2d.get_glider_3d()
+    print(report)
+    """
+    global _timing_depth
+    report = CacheReport(name)
+    before = {id(instance): stat for instance, stat in zip(cache_instances, get_stats(estimate_memory=False))}
+    start = time.perf_counter()
+    _timing_depth += 1
+
+    try:
+        yield report
+    finally:
+        _timing_depth -= 1
+        report.time = time.perf_counter() - start
+
+        for instance, stat in zip(cache_instances, get_stats(estimate_memory=estimate_memory)):
+            if id(instance) in before:
+                stat = stat - before[id(instance)]
+            if stat.calls or stat.evictions:
+                report.stats.append(stat)
+
+
 class CachedObject:
     """
     An object to provide cached properties and functions.
@@ -51,12 +416,28 @@ Result = TypeVar("Result")
 class LruCache(Generic[Result]):
     NotFound = object()
     
-    def __init__(self, maxsize: int=128) -> None:
+    def __init__(self, maxsize: int=128, max_bytes: int | None=None) -> None:
         self.maxsize = maxsize
+        # approximate memory budget (see estimate_size)
+        self.max_bytes = max_bytes
         self.cache: collections.OrderedDict[int, Result] = collections.OrderedDict()
+        self.sizes: dict[int, int] = {}
+        self.size = 0
 
         self.hits = 0
         self.misses = 0
+        self.evictions = 0
+        self.hash_time = 0.
+        self.miss_time = 0.
+
+    def __len__(self) -> int:
+        return len(self.cache)
+
+    def values(self) -> list[Result]:
+        return list(self.cache.values())
+
+    def get_lru_caches(self) -> list[LruCache[Result]]:
+        return [self]
     
     @property
     def cache_full(self) -> bool:
@@ -75,19 +456,138 @@ class LruCache(Generic[Result]):
     def set(self, key: int, value: Result) -> None:
         try:
             self.cache.pop(key)
+            self._forget_size(key)
         except KeyError:
             pass
 
         for _ in range(len(self.cache) - self.maxsize):
-            self.cache.popitem(last=False)
+            self.evict()
 
         self.cache[key] = value
-            
+
+        max_bytes_total = openglider.config["cache_max_bytes"]
+        if self.max_bytes is not None or max_bytes_total is not None:
+            self._add_size(key, estimate_size(value))
+
+            if self.max_bytes is not None:
+                while self.size > self.max_bytes and len(self.cache) > 1:
+                    self.evict()
+
+            if max_bytes_total is not None and _cache_size.total > max_bytes_total:
+                trim(int(max_bytes_total * 0.8))
+
+    def evict(self) -> int:
+        """
+        Remove the least recently used entry, returns the (estimated) size of the entry
+        """
+        key, _ = self.cache.popitem(last=False)
+        self.evictions += 1
+        return self._forget_size(key)
+
+    def update_sizes(self) -> None:
+        """
+        Estimate the size of entries added without size tracking
+        """
+        for key, value in self.cache.items():
+            if key not in self.sizes:
+                self._add_size(key, estimate_size(value))
+
+    def _add_size(self, key: int, size: int) -> None:
+        self.sizes[key] = size
+        self.size += size
+        _cache_size.total += size
+
+    def _forget_size(self, key: int) -> int:
+        size = self.sizes.pop(key, 0)
+        self.size -= size
+        _cache_size.total -= size
+        return size
+
+    def clear(self) -> None:
+        self.cache.clear()
+        _cache_size.total -= self.size
+        self.sizes.clear()
+        self.size = 0
+
+
+class InstanceCache(Generic[Result]):
+    """
+    One LruCache per object, removed together with the object (weakref).
+    Objects without weakref support share one cache.
+    """
+    def __init__(self, maxsize: int=128, max_bytes: int | None=None) -> None:
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.caches: dict[int, LruCache[Result]] = {}
+        self.references: dict[int, weakref.ref] = {}
+        self.shared: LruCache[Result] = LruCache(maxsize, max_bytes)
+        # counters of the caches of collected objects
+        self.removed: LruCache[Result] = LruCache(0)
+
+        self.hash_time = 0.
+        self.miss_time = 0.
+
+    def _get_caches(self) -> list[LruCache[Result]]:
+        return [self.shared, self.removed] + list(self.caches.values())
+
+    def get_lru_caches(self) -> list[LruCache[Result]]:
+        return [self.shared] + list(self.caches.values())
+
+    @property
+    def hits(self) -> int:
+        return sum(cache.hits for cache in self._get_caches())
+
+    @property
+    def misses(self) -> int:
+        return sum(cache.misses for cache in self._get_caches())
+
+    @property
+    def evictions(self) -> int:
+        return sum(cache.evictions for cache in self._get_caches())
+
+    def __len__(self) -> int:
+        return sum(len(cache) for cache in self._get_caches())
+
+    def values(self) -> list[Result]:
+        return sum((cache.values() for cache in self._get_caches()), [])
+
+    def get_cache(self, instance: Any) -> LruCache[Result]:
+        key = id(instance)
+        cache = self.caches.get(key)
+
+        if cache is None:
+            try:
+                self.references[key] = weakref.ref(instance, functools.partial(self._remove, key))
+            except TypeError:
+                return self.shared
+
+            cache = self.caches[key] = LruCache(self.maxsize, self.max_bytes)
+
+        return cache
+
+    def _remove(self, key: int, reference: weakref.ref) -> None:
+        # the id might already be reused
+        if self.references.get(key) is reference:
+            cache = self.caches.pop(key, None)
+            self.references.pop(key, None)
+
+            if cache is not None:
+                cache.clear()
+                self.removed.hits += cache.hits
+                self.removed.misses += cache.misses
+                self.removed.evictions += cache.evictions
+
+    def clear(self) -> None:
+        for cache in self.get_lru_caches():
+            cache.clear()
+        self.caches.clear()
+        self.references.clear()
+
 
 class CachedProperty(Generic[Result]):
     hashlist: list[str]
 
-    def __init__(self, fget: Callable[[CLS], Result], hashlist: list[str], maxsize: int):
+    def __init__(self, fget: Callable[[CLS], Result], hashlist: list[str], maxsize: int, per_instance: bool=False, max_bytes: int | None=None):
         super().__init__()
         self.function = fget
         self.__doc__ = fget.__doc__
@@ -96,7 +596,11 @@ class CachedProperty(Generic[Result]):
         self.__qualname__ = fget.__qualname__
 
         self.hashlist = hashlist
-        self.cache: LruCache[Result] = LruCache(maxsize)
+        self.cache: LruCache[Result] | InstanceCache[Result]
+        if per_instance:
+            self.cache = InstanceCache(maxsize, max_bytes)
+        else:
+            self.cache = LruCache(maxsize, max_bytes)
 
         global cache_instances
         cache_instances.append(self)
@@ -108,29 +612,58 @@ class CachedProperty(Generic[Result]):
         if not openglider.config["caching"]:
             return self.function(parentclass)
         
-        hash_value = hash_attributes(parentclass, self.hashlist)
-        value = self.cache.get(hash_value)
+        timed = _timing_depth > 0
+        if timed:
+            start = time.perf_counter()
+        if openglider.config["cache_generations"]:
+            hash_value = _generation_key_attributes(parentclass, self.hashlist)
+        else:
+            hash_value = hash_attributes(parentclass, self.hashlist)
+        if timed:
+            self.cache.hash_time += time.perf_counter() - start
+
+        if isinstance(self.cache, InstanceCache):
+            cache = self.cache.get_cache(parentclass)
+        else:
+            cache = self.cache
+
+        value = cache.get(hash_value)
 
         if value is None:
+            if timed:
+                start = time.perf_counter()
             value = self.function(parentclass)
-            self.cache.set(hash_value, value)            
+            if timed:
+                self.cache.miss_time += time.perf_counter() - start
+            cache.set(hash_value, value)            
         
         return value
 
 
-def cached_property(*hashlist: str, max_size: int=1024) -> type[property]:
+def cached_property(*hashlist: str, max_size: int=1024, per_instance: bool=False, max_bytes: int | None=None) -> type[property]:
+    """
+    :param per_instance: store the values with the object instead of one lru-cache for all objects
+        (max_size is the size per object then)
+    :param max_bytes: approximate memory budget of the cache (per object if per_instance is set)
+    """
     if TYPE_CHECKING:
         return property
 
     def property_decorator(fget):
-        return CachedProperty(fget, hashlist, max_size)
+        return CachedProperty(fget, hashlist, max_size, per_instance, max_bytes)
     
     return property_decorator
 
 
 F = TypeVar("F")
 
-def cached_function(*hashlist: str, exclude: list[str | None]=None, generator: Callable[[Any], Sequence[Any]]=None, max_size: int=1024) -> Callable[[F], F]:
+def cached_function(*hashlist: str, exclude: list[str | None]=None, generator: Callable[[Any], Sequence[Any]]=None, max_size: int=1024, per_instance: bool=False, max_bytes: int | None=None, persistent: bool=False) -> Callable[[F], F]:
+    """
+    :param per_instance: see cached_property
+    :param max_bytes: see cached_property
+    :param persistent: store the results in the active disk cache session (utils.disk_cache),
+        instances are identified by their (unique) name
+    """
     if TYPE_CHECKING:
         @functools.wraps
         def wrapper(f: F) -> F:
@@ -140,21 +673,52 @@ def cached_function(*hashlist: str, exclude: list[str | None]=None, generator: C
     
     else:
         def wrapper(getter):
-            cache = LruCache(max_size)
+            if per_instance:
+                instance_cache = InstanceCache(max_size, max_bytes)
+            else:
+                lru_cache = LruCache(max_size, max_bytes)
 
             @functools.wraps(getter)
             def new_function(self, *args, **kwargs):
-                cls_hash = hash_attributes(self, hashlist, exclude, generator)
+                if per_instance:
+                    cache = instance_cache.get_cache(self)
+                else:
+                    cache = lru_cache
+
+                timed = _timing_depth > 0
+                if timed:
+                    start = time.perf_counter()
+                if openglider.config.cache_generations:
+                    cls_hash = _generation_key_attributes(self, hashlist, exclude, generator)
+                else:
+                    cls_hash = hash_attributes(self, hashlist, exclude, generator)
                 hashvalue = hash_list(cls_hash, *args, *kwargs.values())
+                if timed:
+                    new_function.cache.hash_time += time.perf_counter() - start
 
                 value = cache.get(hashvalue)
                 if value is None or not openglider.config.caching:
-                    value = getter(self, *args, **kwargs)
+                    session = disk_cache.get_session() if persistent else None
+                    persistent_key = None
+                    if session is not None:
+                        persistent_key = session.get_key(self, *args, **kwargs)
+                    if persistent_key is not None:
+                        value = session.get(new_function.__qualname__, persistent_key)
+
+                    if value is None:
+                        if timed:
+                            start = time.perf_counter()
+                        value = getter(self, *args, **kwargs)
+                        if timed:
+                            new_function.cache.miss_time += time.perf_counter() - start
+                        if persistent_key is not None:
+                            session.set(new_function.__qualname__, persistent_key, value)
+
                     cache.set(hashvalue, value)
                 
                 return value
             
-            new_function.cache = cache
+            new_function.cache = instance_cache if per_instance else lru_cache
             global cache_instances
             cache_instances.append(new_function)
 
@@ -255,6 +819,7 @@ class HashedList(Generic[T]):
     Hashed List to use cached properties
     """
     _hash: int | None
+    _cache_tracked = True
     name = "unnamed"
     def __init__(self, data: list[T], name: str="unnamed"):
         self._data: list[T] = []
@@ -273,6 +838,7 @@ class HashedList(Generic[T]):
     def __setitem__(self, key: int, value: T) -> None:
         self.data[key] = value
         self._hash = None
+        bump_generation(self)
 
     def __hash__(self) -> int:
         if self._hash is None:
@@ -303,6 +869,7 @@ class HashedList(Generic[T]):
             self._hash = None
         else:
             self._data = []
+        bump_generation(self)
 
     def copy(self) -> HashedList[T]:
         return copy.deepcopy(self)
\ No newline at end of file
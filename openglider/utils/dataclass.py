@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Any, TypeVar
+from typing import TYPE_CHECKING, Any, ClassVar, TypeVar
 from collections.abc import Callable
 import euklid
 
@@ -14,7 +14,7 @@ from pydantic import ConfigDict, Field  # export Field
 from typing_extensions import dataclass_transform
 from dataclasses import dataclass as dc, replace
 
-from openglider.utils.cache import CachedProperty, hash_list
+from openglider.utils.cache import CachedProperty, bump_generation, hash_list
 
 if TYPE_CHECKING:
     from pydantic.dataclasses import Dataclass
@@ -78,7 +78,15 @@ def dataclass(_cls: type[Any]) -> type[OGDataclassT]:
 
         _cls.__hash__ = _hash  # type: ignore
 
-        
+    if "__setattr__" not in _cls.__dict__:
+        # track changes for cached properties (config.cache_generations)
+        def __setattr__(instance: Any, name: str, value: Any) -> None:
+            object.__setattr__(instance, name, value)
+            bump_generation(instance, value)
+
+        _cls.__setattr__ = __setattr__  # type: ignore
+        _cls._cache_tracked = True
+
     return _cls_new
 
 
@@ -104,6 +112,13 @@ class BaseModel(pydantic.BaseModel):
         ignored_types=(CachedProperty,),
         extra="forbid"
         )
+
+    # track changes for cached properties (config.cache_generations)
+    _cache_tracked: ClassVar[bool] = True
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        bump_generation(self, value)
     
     def __eq__(self, other: Any) -> bool:
         return other.__class__ == self.__class__ and self.__dict__ == other.__dict__
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import contextlib
+import logging
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Any
+from collections.abc import Iterator
+
+import openglider
+
+logger = logging.getLogger(__name__)
+
+# sessions are bound to the thread (and process) that opened them
+_local = threading.local()
+
+
+def get_session() -> DiskCacheSession | None:
+    session: DiskCacheSession | None = getattr(_local, "session", None)
+    # a forked worker process inherits the session of its parent but never saves it
+    if session is not None and session.pid != os.getpid():
+        return None
+    return session
+
+
+class DiskCacheSession:
+    """
+    Values of persistent cached functions (cached_function(persistent=True)) for one cache key.
+    The values are stored per function in a json file and identified by the name of the instance,
+    which has to be unique within the keyed object (p.e. cell names of a glider).
+    """
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.pid = os.getpid()
+        self.values: dict[str, dict[str, Any]] = {}
+        self.modified: set[str] = set()
+        self.owners: dict[str, Any] = {}
+        self.ambiguous: set[str] = set()
+        self.hits = 0
+        self.misses = 0
+
+    def _get_values(self, function_name: str) -> dict[str, Any]:
+        if function_name not in self.values:
+            path = self.directory / f"{function_name}.json"
+            values: dict[str, Any] = {}
+            if path.exists():
+                try:
+                    with open(path) as infile:
+                        values = openglider.jsonify.load(infile)["data"]
+                except Exception:
+                    logger.warning(f"invalid disk cache file: {path}")
+
+            self.values[function_name] = values
+
+        return self.values[function_name]
+
+    def get_key(self, instance: Any, *args: Any, **kwargs: Any) -> str | None:
+        name = getattr(instance, "name", None)
+        if not name:
+            return None
+
+        key = repr((name, args, sorted(kwargs.items())))
+        # two different objects with the same name can't be told apart
+        # (keep a reference to the owner as ids get reused)
+        owner = self.owners.setdefault(key, instance)
+        if owner is not instance:
+            self.ambiguous.add(key)
+        if key in self.ambiguous:
+            return None
+
+        return key
+
+    def get(self, function_name: str, key: str) -> Any:
+        value = self._get_values(function_name).get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, function_name: str, key: str, value: Any) -> None:
+        self._get_values(function_name)[key] = value
+        self.modified.add(function_name)
+
+    def save(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for function_name in self.modified:
+            values = {
+                key: value for key, value in self.values[function_name].items() if key not in self.ambiguous
+            }
+            with open(self.directory / f"{function_name}.json", "w") as outfile:
+                openglider.jsonify.dump(values, outfile, pretty=False)
+
+        self.modified.clear()
+
+
+class DiskCache:
+    """
+    Persistent cache for expensive results derived from an object (p.e. a ParametricGlider),
+    keyed by a content hash of the object and the openglider version.
+    Enable it with config.disk_cache, the files are stored in config.home_directory / "cache".
+    The least recently used keys are removed once the directory grows beyond max_bytes.
+    """
+    def __init__(self, directory: Path | None = None, max_bytes: int | None = None):
+        if directory is None:
+            directory = openglider.config.home_directory / "cache"
+        if max_bytes is None:
+            max_bytes = openglider.config.disk_cache_max_bytes
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+
+    @classmethod
+    def get_default(cls) -> DiskCache | None:
+        if not openglider.config.disk_cache:
+            return None
+        return cls()
+
+    @staticmethod
+    def get_key(*objects: Any) -> str:
+        return openglider.jsonify.digest([openglider.__version__, *objects])
+
+    @contextlib.contextmanager
+    def session(self, key: str) -> Iterator[DiskCacheSession]:
+        """
+        Load and store the results of persistent cached functions for the given key
+        """
+        if get_session() is not None:
+            raise ValueError("disk cache session already active")
+
+        session = DiskCacheSession(self.directory / key)
+        if session.directory.exists():
+            # mark as recently used
+            os.utime(session.directory)
+
+        _local.session = session
+        try:
+            yield session
+            session.save()
+            logger.info(f"disk cache {key}: {session.hits} hits, {session.misses} misses")
+        finally:
+            _local.session = None
+
+        self.evict(keep=key)
+
+    def get_size(self, key: str) -> int:
+        size = 0
+        for path in (self.directory / key).iterdir():
+            with contextlib.suppress(OSError):
+                size += path.stat().st_size
+        return size
+
+    def evict(self, keep: str | None = None) -> None:
+        """
+        Remove the least recently used keys until the cache fits into max_bytes
+        """
+        if not self.directory.exists():
+            return
+
+        entries = []
+        for path in self.directory.iterdir():
+            if not path.is_dir():
+                continue
+            try:
+                entries.append((path.stat().st_mtime, path.name, self.get_size(path.name)))
+            except OSError:
+                # removed by another process
+                continue
+
+        total = sum(entry[2] for entry in entries)
+        for _mtime, key, size in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+
+            logger.info(f"disk cache: remove {key}")
+            shutil.rmtree(self.directory / key, ignore_errors=True)
+            total -= size
+
+    def clear(self) -> None:
+        if self.directory.exists():
+            shutil.rmtree(self.directory)
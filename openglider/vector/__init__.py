@@ -0,0 +1,3 @@
+from openglider.vector import pickling
+
+pickling.register()
@@ -1 +1,2 @@
-from openglider.vector.drawing.layout import Layout, PlotPart
\ No newline at end of file
+from openglider.vector.drawing.layout import Layout, PlotPart
+from openglider.vector.drawing.writer import DXFWriter, LayoutStream, SVGWriter
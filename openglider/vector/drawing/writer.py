@@ -0,0 +1,177 @@
+"""
+Write layouts to a file one after another, without keeping all parts in memory
+"""
+from __future__ import annotations
+
+import math
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from types import TracebackType
+from typing import IO, Any
+
+import euklid
+import svgwrite
+from ezdxf.addons.r12writer import R12FastStreamWriter
+
+from openglider.vector.drawing.layout import Layout
+
+
+class LayoutWriter:
+    def __init__(self, path: str | os.PathLike):
+        self.path = Path(path)
+
+    def __enter__(self) -> LayoutWriter:
+        self.open()
+        return self
+
+    def __exit__(self, exc_type: type[BaseException] | None, exc: BaseException | None, traceback: TracebackType | None) -> None:
+        self.close()
+
+    def open(self) -> None:
+        raise NotImplementedError()
+
+    def write(self, layout: Layout) -> None:
+        raise NotImplementedError()
+
+    def close(self) -> None:
+        raise NotImplementedError()
+
+
+class DXFWriter(LayoutWriter):
+    """
+    Stream the layouts to a R12 dxf file.
+    There is no layer table, the layer colors are set per entity.
+    """
+    _file: IO[str]
+    _writer: R12FastStreamWriter
+
+    def open(self) -> None:
+        self._file = open(self.path, "w", encoding="cp1252")
+        self._writer = R12FastStreamWriter(self._file)
+
+    def write(self, layout: Layout) -> None:
+        for part in layout.parts:
+            for layer_name, layer in part.layers.items():
+                # hidden layers can't be switched off without a layer table
+                if not layer.visible:
+                    continue
+
+                color = layer._get_dxf_attributes()["color"]
+
+                for line in layer:
+                    nodes = line.tolist()
+                    if len(nodes) == 1:
+                        self._writer.add_point(nodes[0], layer=layer_name, color=color)
+                    elif len(nodes) > 1:
+                        closed = len(nodes) > 2 and nodes[0] == nodes[-1]
+                        self._writer.add_polyline_2d(nodes, closed=closed, layer=layer_name, color=color)
+
+    def close(self) -> None:
+        self._writer.close()
+        self._file.close()
+
+
+class SVGWriter(LayoutWriter):
+    """
+    Write the layouts to a temporary file and add the svg header (size and viewbox) on close
+    """
+    _body: IO[str]
+
+    def __init__(self, path: str | os.PathLike, unit: str="mm", border: float=0.02, fill: bool=False):
+        super().__init__(path)
+        self.unit = unit
+        self.border = border
+        self.fill = fill
+
+        self.min_x = self.min_y = math.inf
+        self.max_x = self.max_y = -math.inf
+
+    def open(self) -> None:
+        self._body = tempfile.TemporaryFile("w+")
+
+    def write(self, layout: Layout) -> None:
+        if not layout.parts:
+            return
+
+        self.min_x = min(self.min_x, layout.min_x)
+        self.min_y = min(self.min_y, layout.min_y)
+        self.max_x = max(self.max_x, layout.max_x)
+        self.max_y = max(self.max_y, layout.max_y)
+
+        self._body.write(layout.get_svg_group(fill=self.fill).tostring())
+
+    def close(self) -> None:
+        if self.min_x > self.max_x:
+            self.min_x = self.min_y = self.max_x = self.max_y = 0.
+
+        # same as Layout.get_svg_drawing
+        border_w = 2 * self.border * (self.max_x - self.min_x)
+        border_h = 2 * self.border * (self.max_y - self.min_y)
+        width = self.max_x - self.min_x + border_w
+        height = self.max_y - self.min_y + border_h
+
+        drawing = svgwrite.Drawing(size=[f"{n}{self.unit}" for n in (width, height)])
+        drawing.viewbox(self.min_x-border_w/2, -self.max_y-border_h/2, width, height)
+        svg = drawing.tostring()
+        end = svg.rindex("</svg>")
+
+        with open(self.path, "w") as outfile:
+            outfile.write(svg[:end])
+            self._body.seek(0)
+            shutil.copyfileobj(self._body, outfile)
+            outfile.write(svg[end:])
+
+        self._body.close()
+
+
+class LayoutStream:
+    """
+    Arrange layouts in rows (left to right, rows from top to bottom) and pass them to the writers
+    as soon as they are added. The layouts are scaled after placing them.
+    """
+    def __init__(self, writers: list[LayoutWriter], distance_x: float, distance_y: float, scale: float=1.):
+        self.writers = writers
+        self.distance_x = distance_x
+        self.distance_y = distance_y
+        self.scale = scale
+
+        self.x = 0.
+        self.y = 0.
+        self.row_min_y = 0.
+        self.row_empty = True
+
+    def __enter__(self) -> LayoutStream:
+        for writer in self.writers:
+            writer.open()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        for writer in self.writers:
+            writer.close()
+
+    def add(self, layout: Layout) -> None:
+        if layout.is_empty():
+            return
+
+        if self.row_empty:
+            self.row_min_y = self.y
+            self.row_empty = False
+
+        layout.move_to(euklid.vector.Vector2D([self.x, self.y - layout.height]))
+        self.x = layout.max_x + self.distance_x
+        self.row_min_y = min(self.row_min_y, layout.min_y)
+
+        if self.scale != 1:
+            layout.scale(self.scale)
+
+        for writer in self.writers:
+            writer.write(layout)
+
+    def new_row(self) -> None:
+        if not self.row_empty:
+            self.y = self.row_min_y - self.distance_y
+            self.row_empty = True
+
+        self.x = 0.
@@ -0,0 +1,66 @@
+"""
+Pickle support for the euklid types (p.e. to send gliders and plotparts to a ProcessPoolExecutor)
+"""
+from __future__ import annotations
+
+import copyreg
+import math
+from typing import Any
+
+import euklid
+
+_registered = False
+
+
+def _reduce_vector(vector: Any) -> tuple[Any, ...]:
+    return type(vector), (list(vector),)
+
+
+def _reduce_polyline(line: Any) -> tuple[Any, ...]:
+    return type(line), (line.tolist(),)
+
+
+def _reduce_interpolation(interpolation: euklid.vector.Interpolation) -> tuple[Any, ...]:
+    nodes = interpolation.tolist()
+    if not nodes:
+        return euklid.vector.Interpolation, (nodes,)
+
+    # the extrapolate flag is not exposed
+    try:
+        interpolation.get_value(nodes[-1][0] + 1)
+        extrapolate = True
+    except RuntimeError:
+        extrapolate = False
+
+    return euklid.vector.Interpolation, (nodes, extrapolate)
+
+
+def _reduce_spline(curve: Any) -> tuple[Any, ...]:
+    return type(curve), (curve.controlpoints.tolist(),)
+
+
+def _reduce_rotation(rotation: euklid.vector.Rotation2D) -> tuple[Any, ...]:
+    x = rotation.apply(euklid.vector.Vector2D([1, 0]))
+    return euklid.vector.Rotation2D, (math.atan2(x[1], x[0]),)
+
+
+def register() -> None:
+    global _registered
+    if _registered:
+        return
+
+    for vector_cls in (euklid.vector.Vector2D, euklid.vector.Vector3D):
+        copyreg.pickle(vector_cls, _reduce_vector)
+
+    for line_cls in (euklid.vector.PolyLine2D, euklid.vector.PolyLine3D):
+        copyreg.pickle(line_cls, _reduce_polyline)
+
+    copyreg.pickle(euklid.vector.Interpolation, _reduce_interpolation)
+    copyreg.pickle(euklid.vector.Rotation2D, _reduce_rotation)
+
+    for name in dir(euklid.spline):
+        spline_cls = getattr(euklid.spline, name)
+        if isinstance(spline_cls, type) and hasattr(spline_cls, "controlpoints"):
+            copyreg.pickle(spline_cls, _reduce_spline)
+
+    _registered = True